@@ -0,0 +1,52 @@
+import os
+
+import pandas as pd
+import streamlit as st
+
+from quiz_engine import load_role_config
+from telemetry import drain_rerun_spans, get_telemetry, span, start_rerun
+
+# One process serves every TaskGene page, so the IAM token cache, HTTP pool,
+# response cache and question bank are shared and stay warm across roles.
+st.set_page_config(page_title="TaskGene", layout="wide")
+
+
+def role_page(path, role):
+    config = load_role_config(role)
+    return st.Page(path, title=config["page_title"], icon=config["page_icon"])
+
+
+pages = {
+    "Manager": [st.Page("Manager.py", title="Manager Panel", icon="👔", default=True)],
+    "Challenges": [
+        role_page("Exceluser.py", "excel"),
+        role_page("CustomerCare.py", "customer_care"),
+        role_page("Developer.py", "developer"),
+    ],
+}
+
+# Per-rerun latency breakdown in the sidebar: TASKGENE_DEBUG_PANEL=1 or ?debug=1
+def show_perf_panel(page, rerun_id):
+    spans = drain_rerun_spans(rerun_id)
+    with st.sidebar.expander("🔬 Rerun latency breakdown"):
+        if not spans:
+            st.caption("No spans recorded in this rerun.")
+            return
+        total = next((s["ms"] for s in reversed(spans) if s["span"] == "rerun"), None)
+        st.caption(f"{page}: {total:.0f} ms" if total is not None else page)
+        breakdown = pd.DataFrame(spans).groupby("span")["ms"].agg(["count", "sum", "max"]).sort_values("sum", ascending=False)
+        st.dataframe(breakdown.round(1), use_container_width=True)
+        telemetry = get_telemetry()
+        st.caption(f"Watsonx tokens so far: {telemetry.tokens['input']} in / {telemetry.tokens['generated']} out")
+
+
+page = st.navigation(pages)
+rerun_id = start_rerun()
+try:
+    with span("rerun", page=page.title):
+        page.run()
+finally:
+    get_telemetry().maybe_export()
+
+if os.environ.get("TASKGENE_DEBUG_PANEL") == "1" or st.query_params.get("debug") == "1":
+    show_perf_panel(page.title, rerun_id)
@@ -0,0 +1,419 @@
+import atexit
+import io
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from storage import DATA_DIR, data_path
+from telemetry import span
+
+# Monotony / productivity / skill-engagement scores computed from activity logs.
+# Logs are JSONL or CSV files of events with columns person, date, task and optionally category, hours and
+# completed; every *.jsonl / *.csv under ACTIVITY_DIR is tailed, so appended lines are read once.
+ACTIVITY_DIR = os.environ.get("TASKGENE_ACTIVITY_DIR", os.path.join(DATA_DIR, "activity"))
+LOG_SUFFIXES = (".jsonl", ".csv")
+
+# Logs are parsed a block at a time, so memory stays flat whatever the file size
+BLOCK_BYTES = 8 << 20
+WINDOW_DAYS = 28
+# A person spreading their events evenly over this many distinct tasks counts as fully varied
+REFERENCE_TASKS = 8
+REFERENCE_CATEGORIES = 4
+DEFAULT_CATEGORY = "General"
+UPSKILLING_CATEGORY = "Upskilling"
+DEFAULT_HOURS = 1.0
+
+# "7 hours of invoice reconciliation" and "7.5 hours of invoice reconciliation" are the same task
+_NUMBER = r"\d+(?:\.\d+)?\+?"
+_HOURS_IN_TASK = r"(\d+(?:\.\d+)?)\s*(?:hours?|hrs?)\b"
+
+# State is written to disk off the script thread, one write at a time
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="activity-writer")
+
+_ARRAYS = ("events", "completed", "hours", "clogc", "distinct", "cat_hours",
+           "w_days", "w_events", "w_completed", "w_hours", "w_cat_hours", "pair_keys", "pair_counts")
+
+
+def _xlogx(x):
+    x = np.asarray(x, dtype=float)
+    return np.where(x > 0, x * np.log(np.maximum(x, 1)), 0.0)
+
+
+# Shannon entropy of each row, normalized so `reference` equally used columns give 1
+def _row_entropy(weights, reference):
+    totals = weights.sum(axis=1)
+    safe = np.where(totals > 0, totals, 1)
+    shares = weights / safe[:, None]
+    entropy = -(shares * np.log(np.where(shares > 0, shares, 1))).sum(axis=1)
+    return np.clip(entropy / np.log(reference), 0, 1)
+
+
+# Ids for a block's distinct values, adding unseen ones to the vocabulary
+def _intern(ids, names, values):
+    out = np.empty(len(values), dtype=np.int64)
+    for i, value in enumerate(values):
+        if value not in ids:
+            ids[value] = len(names)
+            names.append(value)
+        out[i] = ids[value]
+    return out
+
+
+# Incremental per-person aggregates in flat NumPy arrays (one row per person, one column per category):
+# all-time counts and hours, a WINDOW_DAYS ring of daily counts for the rolling window, and sorted
+# (person, task) keys with counts, from which the running Σ c·log c gives each person's task entropy
+class ActivityScoreEngine:
+    def __init__(self, path=None, window_days=WINDOW_DAYS):
+        self.path = path or data_path("activity_scores.npz")
+        self.window_days = window_days
+        self.people, self._person_ids = [], {}
+        self.categories, self._category_ids = [], {}
+        self.tasks, self._task_ids = [], {}
+        # Bytes already read (and the CSV header) per log file; entries already read per record source
+        self.offsets = {}
+        self.latest_day = None
+        self.version = 0
+        self._synced_version = None
+        self._scores = {}
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._save_queued = False
+        self._allocate(16, 8)
+        if os.path.exists(self.path):
+            self._load()
+        atexit.register(self._flush_pending)
+
+    def _flush_pending(self):
+        if self._save_queued:
+            self.flush()
+
+    def _allocate(self, people, categories):
+        w = self.window_days
+        self.events = np.zeros(people)
+        self.completed = np.zeros(people)
+        self.hours = np.zeros(people)
+        self.clogc = np.zeros(people)
+        self.distinct = np.zeros(people, dtype=np.int64)
+        self.cat_hours = np.zeros((people, categories))
+        self.w_days = np.full(w, -1, dtype=np.int64)
+        self.w_events = np.zeros((people, w))
+        self.w_completed = np.zeros((people, w))
+        self.w_hours = np.zeros((people, w))
+        self.w_cat_hours = np.zeros((people, w, categories), dtype=np.float32)
+        self.pair_keys = np.zeros(0, dtype=np.int64)
+        self.pair_counts = np.zeros(0, dtype=np.int64)
+
+    # Capacity doubles, so a stream of new people or categories costs amortized O(1) copies
+    def _ensure_capacity(self):
+        people, categories = self.cat_hours.shape
+        need_people, need_categories = len(self.people), len(self.categories)
+        if need_people <= people and need_categories <= categories:
+            return
+        while people < need_people:
+            people *= 2
+        while categories < need_categories:
+            categories *= 2
+        old = {name: getattr(self, name) for name in _ARRAYS}
+        self._allocate(people, categories)
+        for name, array in old.items():
+            target = getattr(self, name)
+            if name in ("w_days", "pair_keys", "pair_counts"):
+                setattr(self, name, array)
+            else:
+                target[tuple(slice(0, n) for n in array.shape)] = array
+
+    # Clear ring slots that fell out of the window and claim the slots of the given (in-window) days
+    def _advance_window(self, days):
+        w = self.window_days
+        stale = self.w_days <= self.latest_day - w
+        for day in np.unique(days):
+            slot = day % w
+            if self.w_days[slot] != day:
+                stale[slot] = True
+        stale_slots = np.flatnonzero(stale)
+        self.w_events[:, stale_slots] = 0
+        self.w_completed[:, stale_slots] = 0
+        self.w_hours[:, stale_slots] = 0
+        self.w_cat_hours[:, stale_slots] = 0
+        self.w_days[stale_slots] = -1
+        self.w_days[np.unique(days) % w] = np.unique(days)
+
+    def _update_entropy(self, pid, tid):
+        keys, counts = np.unique((pid << 32) | tid, return_counts=True)
+        pos = np.searchsorted(self.pair_keys, keys)
+        found = pos < len(self.pair_keys)
+        found[found] = self.pair_keys[pos[found]] == keys[found]
+        old = np.zeros(len(keys), dtype=np.int64)
+        old[found] = self.pair_counts[pos[found]]
+        new = old + counts
+        people = keys >> 32
+        size = len(self.events)
+        self.clogc += np.bincount(people, weights=_xlogx(new) - _xlogx(old), minlength=size)
+        self.distinct += np.bincount(people[~found], minlength=size)
+        self.pair_counts[pos[found]] = new[found]
+        self.pair_keys = np.insert(self.pair_keys, pos[~found], keys[~found])
+        self.pair_counts = np.insert(self.pair_counts, pos[~found], new[~found])
+
+    # frame: one row per event (person, date, task[, category, hours, completed]); returns events ingested
+    def ingest_frame(self, frame):
+        if not {"person", "date", "task"}.issubset(frame.columns):
+            return 0
+        frame = frame.dropna(subset=["person", "date", "task"])
+        days = pd.to_datetime(frame["date"], errors="coerce", format="ISO8601", utc=True).dt.tz_localize(None)
+        frame, days = frame[days.notna()], days[days.notna()]
+        if frame.empty:
+            return 0
+        days = days.to_numpy().astype("datetime64[D]").astype(np.int64)
+        with self._lock:
+            codes, values = pd.factorize(frame["person"].astype(str).str.strip())
+            pid = _intern(self._person_ids, self.people, values)[codes]
+            category = (frame["category"].fillna(DEFAULT_CATEGORY) if "category" in frame
+                        else pd.Series(DEFAULT_CATEGORY, index=frame.index))
+            codes, values = pd.factorize(category.astype(str).str.strip())
+            cid = _intern(self._category_ids, self.categories, values)[codes]
+            codes, values = pd.factorize(frame["task"].astype(str))
+            raw = pd.Series(values)
+            normalized = (raw.str.lower().str.replace(_NUMBER, "#", regex=True)
+                          .str.replace(r"\s+", " ", regex=True).str.strip())
+            tid = _intern(self._task_ids, self.tasks, normalized)[codes]
+            task_hours = pd.to_numeric(raw.str.extract(_HOURS_IN_TASK, expand=False), errors="coerce").to_numpy()
+            hours = task_hours[codes]
+            if "hours" in frame:
+                given = pd.to_numeric(frame["hours"], errors="coerce").to_numpy(dtype=float)
+                hours = np.where(np.isnan(given), hours, given)
+            hours = np.where(np.isnan(hours), DEFAULT_HOURS, hours)
+            done = (frame["completed"].fillna(True).astype(bool).to_numpy(dtype=float) if "completed" in frame
+                    else np.ones(len(frame)))
+            self._ensure_capacity()
+
+            size, n_categories = self.cat_hours.shape
+            self.events += np.bincount(pid, minlength=size)
+            self.completed += np.bincount(pid, weights=done, minlength=size)
+            self.hours += np.bincount(pid, weights=hours, minlength=size)
+            self.cat_hours += np.bincount(pid * n_categories + cid, weights=hours,
+                                          minlength=size * n_categories).reshape(size, n_categories)
+            self._update_entropy(pid, tid)
+
+            latest = int(days.max()) if self.latest_day is None else max(self.latest_day, int(days.max()))
+            self.latest_day = latest
+            recent = days > latest - self.window_days
+            if recent.any():
+                self._advance_window(days[recent])
+                w = self.window_days
+                cell = pid[recent] * w + days[recent] % w
+                for target, weights in ((self.w_events, None), (self.w_completed, done[recent]),
+                                        (self.w_hours, hours[recent])):
+                    target += np.bincount(cell, weights=weights, minlength=size * w).reshape(size, w)
+                self.w_cat_hours += np.bincount(cell * n_categories + cid[recent], weights=hours[recent],
+                                                minlength=size * w * n_categories).reshape(size, w, n_categories)
+            self.version += 1
+            return len(frame)
+
+    # Malformed lines are skipped rather than failing the block (and every later rerun with it)
+    def _parse_block(self, block, suffix, header):
+        if suffix == ".csv":
+            return pd.read_csv(io.BytesIO(block), header=None, names=header, dtype={"person": str, "task": str},
+                               on_bad_lines="skip")
+        try:
+            return pd.read_json(io.BytesIO(block), lines=True, dtype=False)
+        except ValueError:
+            records = []
+            for line in block.splitlines():
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    records.append(record)
+            return pd.DataFrame(records)
+
+    # Read whatever was appended to one log since the last call; a partial last line waits for the next call.
+    # The offset advances after each block, so a failure part-way never re-counts the blocks before it.
+    def ingest_file(self, path):
+        suffix = os.path.splitext(path)[1].lower()
+        size = os.path.getsize(path)
+        with self._lock:
+            state = self.offsets.get(path, {"offset": 0, "header": None})
+            if size < state["offset"]:
+                state = {"offset": 0, "header": None}
+            if size == state["offset"]:
+                return 0
+            self.offsets[path] = state
+            ingested = 0
+            with span("activity_ingest", file=os.path.basename(path)) as attrs, open(path, "rb") as f:
+                f.seek(state["offset"])
+                pending = b""
+                while True:
+                    data = f.read(BLOCK_BYTES)
+                    if not data:
+                        break
+                    pending += data
+                    cut = pending.rfind(b"\n")
+                    if cut < 0:
+                        continue
+                    block, pending = pending[:cut], pending[cut + 1:]
+                    if suffix == ".csv" and state["header"] is None:
+                        first, _, block = block.partition(b"\n")
+                        state["header"] = first.decode("utf-8-sig").strip().split(",")
+                    try:
+                        if block.strip():
+                            ingested += self.ingest_frame(self._parse_block(block + b"\n", suffix, state["header"]))
+                    finally:
+                        state["offset"] += cut + 1
+                        self.save()
+                attrs["events"] = ingested
+            return ingested
+
+    def ingest_directory(self, directory=ACTIVITY_DIR):
+        if not os.path.isdir(directory):
+            return 0
+        return sum(self.ingest_file(os.path.join(directory, name)) for name in sorted(os.listdir(directory))
+                   if name.lower().endswith(LOG_SUFFIXES))
+
+    # In-app events (a role's task history, a finished quiz). With a source, only records past the number
+    # already read from that source are ingested, so replaying the same list is a no-op.
+    def ingest_records(self, records, source=None, **defaults):
+        with self._lock:
+            start = self.offsets.get(source, 0) if source else 0
+            records = records[start:]
+            if not records:
+                return 0
+            ingested = self.ingest_frame(pd.DataFrame(records).assign(**defaults))
+            if source:
+                self.offsets[source] = start + len(records)
+            self.save()
+            return ingested
+
+    # One row per person: monotony, productivity and skill engagement (0-100) plus event counts.
+    # With window=True the rolling window is used for everyone active in it and older activity falls back
+    # to all-time totals; window=False scores everyone on all-time totals (task entropy is always all-time).
+    def scores(self, window=True):
+        with self._lock:
+            cached = self._scores.get(window)
+            if cached is not None and cached[0] == self.version:
+                return cached[1]
+            n, c = len(self.people), len(self.categories)
+            events = self.events[:n]
+            active = self.w_events[:n].sum(axis=1)
+            recent = active > 0 if window else np.zeros(n, dtype=bool)
+            window_cats = self.w_cat_hours[:n, :, :c].sum(axis=1, dtype=float)
+            cat_hours = np.where(recent[:, None], window_cats, self.cat_hours[:n, :c])
+            completed = np.where(recent, self.w_completed[:n].sum(axis=1), self.completed[:n])
+            hours = np.where(recent, self.w_hours[:n].sum(axis=1), self.hours[:n])
+            counted = np.where(recent, active, events)
+
+            safe_events = np.where(events > 0, events, 1)
+            task_entropy = np.log(safe_events) - self.clogc[:n] / safe_events
+            task_variety = np.clip(task_entropy / np.log(REFERENCE_TASKS), 0, 1)
+            total_hours = cat_hours.sum(axis=1)
+            top_share = np.divide(cat_hours.max(axis=1, initial=0), total_hours,
+                                  out=np.ones(n), where=total_hours > 0)
+            monotony = 100 * (0.5 * (1 - task_variety) + 0.5 * top_share)
+
+            completion = np.divide(completed, counted, out=np.zeros(n), where=counted > 0)
+            throughput = np.divide(completed, hours, out=np.zeros(n), where=hours > 0)
+            typical = np.median(throughput[hours > 0]) if (hours > 0).any() else 0.0
+            pace = np.minimum(throughput / typical, 1) if typical else np.zeros(n)
+            productivity = 100 * (0.5 * completion + 0.5 * pace)
+
+            skill = 100 * _row_entropy(cat_hours, REFERENCE_CATEGORIES)
+            cached = pd.DataFrame({
+                "name": self.people,
+                "monotony": np.rint(monotony).astype(int),
+                "productivity": np.rint(productivity).astype(int),
+                "skill": np.rint(skill).astype(int),
+                "events": events.astype(int),
+                "window_events": active.astype(int),
+            })
+            self._scores[window] = (self.version, cached)
+            return cached
+
+    def person_scores(self, name, window=True):
+        scores = self.scores(window)
+        row = scores[scores["name"] == name]
+        if row.empty:
+            return None
+        return {key: int(row.iloc[0][key]) for key in ("monotony", "productivity", "skill")}
+
+    # Hours per category over the rolling window, optionally for a subset of people
+    def category_hours(self, names=None):
+        with self._lock:
+            n, c = len(self.people), len(self.categories)
+            rows = (np.arange(n) if names is None
+                    else np.array([self._person_ids[name] for name in names if name in self._person_ids], dtype=int))
+            hours = self.w_cat_hours[rows, :, :c].sum(axis=(0, 1), dtype=float)
+            return {category: round(float(h), 2) for category, h in
+                    sorted(zip(self.categories, hours), key=lambda item: -item[1]) if h > 0}
+
+    # Push fresh scores into the Manager's team store: scores for members seen in the logs and, once log
+    # files have been read, the team's windowed workload. Cheap when nothing changed since the last sync.
+    def sync_team_store(self, store, directory=ACTIVITY_DIR):
+        self.ingest_directory(directory)
+        with self._lock:
+            if self._synced_version == self.version or not self.people:
+                return False
+            members = store.load_members()[0]["name"].tolist()
+            scores = self.scores()
+            scores = scores[scores["name"].isin(members)]
+            if not scores.empty:
+                store.update_scores(scores)
+            if any(isinstance(state, dict) for state in self.offsets.values()):
+                workload = self.category_hours(members)
+                if workload:
+                    store.set_workload(workload)
+            self._synced_version = self.version
+            return True
+
+    # Queue a write of the current state; saves requested while one is queued fold into it
+    def save(self):
+        with self._save_lock:
+            if self._save_queued:
+                return
+            self._save_queued = True
+        _writer.submit(self.flush)
+
+    # Snapshot under the lock, write outside it, so ingestion and scoring never wait on the disk
+    def flush(self):
+        with self._write_lock:
+            with self._save_lock:
+                self._save_queued = False
+            with self._lock:
+                arrays = {name: getattr(self, name).copy() for name in _ARRAYS}
+                arrays.update(people=np.array(self.people, dtype=str), categories=np.array(self.categories, dtype=str),
+                              tasks=np.array(self.tasks, dtype=str),
+                              meta=np.array(json.dumps({"offsets": self.offsets, "latest_day": self.latest_day})))
+            tmp = self.path + ".tmp.npz"
+            np.savez(tmp, **arrays)
+            os.replace(tmp, self.path)
+
+    def _load(self):
+        with np.load(self.path) as saved:
+            if saved["w_days"].shape[0] != self.window_days:
+                return
+            for name in _ARRAYS:
+                setattr(self, name, saved[name])
+            self.people, self.categories, self.tasks = (saved[key].tolist() for key in ("people", "categories", "tasks"))
+            meta = json.loads(str(saved["meta"]))
+        self._person_ids = {name: i for i, name in enumerate(self.people)}
+        self._category_ids = {name: i for i, name in enumerate(self.categories)}
+        self._task_ids = {name: i for i, name in enumerate(self.tasks)}
+        self.offsets = meta["offsets"]
+        self.latest_day = meta["latest_day"]
+
+
+_default_engine = None
+_default_engine_lock = threading.Lock()
+
+
+def get_activity_engine():
+    global _default_engine
+    if _default_engine is None:
+        with _default_engine_lock:
+            if _default_engine is None:
+                _default_engine = ActivityScoreEngine()
+    return _default_engine
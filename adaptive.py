@@ -0,0 +1,129 @@
+import os
+import threading
+
+import numpy as np
+
+from attempt_log import question_key
+from question_bank import get_question_bank
+from storage import data_path
+
+# Ability grid for the posterior; standard normal prior
+THETA = np.linspace(-4, 4, 81)
+PRIOR = np.exp(-0.5 * THETA ** 2)
+PRIOR /= PRIOR.sum()
+
+# Logistic scaling constant that makes the 2PL close to the normal ogive
+D = 1.7
+DEFAULT_A = 1.0
+MIN_ITEMS = 3
+MAX_ITEMS = 15
+CONFIDENCE = 0.95
+
+
+def item_params_path(role):
+    return data_path(f"item_params_{role}.npz")
+
+
+# Convert classical stats (proportion correct, item-total correlation) to 2PL parameters
+# with Lord's approximations: a = r / sqrt(1 - r^2), b = -z(p) / r
+def calibrate_from_stats(difficulty, discrimination):
+    p = np.clip(np.asarray(difficulty, dtype=float), 0.02, 0.98)
+    r = np.clip(np.nan_to_num(np.asarray(discrimination, dtype=float), nan=0.3), 0.1, 0.9)
+    a = np.clip(r / np.sqrt(1 - r ** 2), 0.3, 3.0)
+    b = -np.log(p / (1 - p)) / (D * r)
+    return a, np.clip(b, -3.5, 3.5)
+
+
+def save_item_params(role, question_stats):
+    rows = question_stats[question_stats["role"] == role]
+    a, b = calibrate_from_stats(rows["difficulty"], rows["discrimination"])
+    np.savez(item_params_path(role), keys=rows["question_key"].to_numpy(dtype=str), a=a, b=b)
+    _item_banks.pop(role, None)
+    return len(rows)
+
+
+def _load_item_params(role):
+    path = item_params_path(role)
+    if not os.path.exists(path):
+        return {}
+    saved = np.load(path)
+    return {key: (a, b) for key, a, b in zip(saved["keys"], saved["a"], saved["b"])}
+
+
+# All questions for a role plus aligned parameter arrays
+class ItemBank:
+    def __init__(self, role, questions, params):
+        self.role = role
+        self.questions = questions
+        fitted = [params.get(question_key(role, q)) for q in questions]
+        self.a = np.array([f[0] if f else DEFAULT_A for f in fitted], dtype=float)
+        self.b = np.array([f[1] if f else 0.0 for f in fitted], dtype=float)
+
+    def __len__(self):
+        return len(self.questions)
+
+    # P(correct) for every item at every grid point: shape (items, grid)
+    def probabilities(self, theta):
+        return 1.0 / (1.0 + np.exp(-D * self.a[:, None] * (np.atleast_1d(theta)[None, :] - self.b[:, None])))
+
+    # Ability where the expected share correct across the bank equals the pass fraction
+    def cut_score(self, pass_fraction):
+        expected = self.probabilities(THETA).mean(axis=0)
+        return float(np.interp(pass_fraction, expected, THETA))
+
+
+_item_banks = {}
+_item_banks_lock = threading.Lock()
+
+
+# Rebuilt when the role's question count changes (new generated sets) or after recalibration
+def load_item_bank(role):
+    questions = get_question_bank().all_questions(role)
+    with _item_banks_lock:
+        cached = _item_banks.get(role)
+        if cached is None or len(cached) != len(questions):
+            cached = _item_banks[role] = ItemBank(role, questions, _load_item_params(role))
+        return cached
+
+
+# One user's adaptive run: Bayesian posterior over ability, max-information item choice, confident stop
+class AdaptiveTest:
+    def __init__(self, bank, pass_fraction, max_items=MAX_ITEMS):
+        self.role = bank.role
+        self.cut = bank.cut_score(pass_fraction)
+        self.max_items = min(max_items, len(bank))
+        self.posterior = PRIOR.copy()
+        self.asked = []
+        self.responses = []
+
+    def theta(self):
+        return float((THETA * self.posterior).sum())
+
+    def pass_probability(self):
+        return float(self.posterior[THETA >= self.cut].sum())
+
+    def done(self):
+        if len(self.asked) >= self.max_items:
+            return True
+        if len(self.asked) < MIN_ITEMS:
+            return False
+        p = self.pass_probability()
+        return p >= CONFIDENCE or p <= 1 - CONFIDENCE
+
+    def passed(self):
+        return self.pass_probability() >= 0.5
+
+    def next_item(self, bank):
+        if self.done():
+            return None
+        p = bank.probabilities(self.theta())[:, 0]
+        information = (D * bank.a) ** 2 * p * (1 - p)
+        information[self.asked] = -np.inf
+        return int(np.argmax(information))
+
+    def record(self, bank, index, correct):
+        p = 1.0 / (1.0 + np.exp(-D * bank.a[index] * (THETA - bank.b[index])))
+        self.posterior *= p if correct else 1 - p
+        self.posterior /= self.posterior.sum()
+        self.asked.append(index)
+        self.responses.append(bool(correct))
@@ -0,0 +1,162 @@
+import atexit
+import hashlib
+import sqlite3
+import threading
+import time
+import uuid
+
+from storage import data_path
+
+FLUSH_INTERVAL = 2.0
+FLUSH_BATCH = 500
+COMPACT_INTERVAL = 300.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS attempts (attempt_id TEXT PRIMARY KEY, user TEXT, role TEXT, score INTEGER,
+                                     total INTEGER, passed INTEGER, started_at REAL, submitted_at REAL);
+CREATE TABLE IF NOT EXISTS answer_events (id INTEGER PRIMARY KEY, attempt_id TEXT, user TEXT, role TEXT,
+                                          question_key TEXT, position INTEGER, option_index INTEGER,
+                                          correct_index INTEGER, correct INTEGER, seconds REAL, ts REAL);
+CREATE INDEX IF NOT EXISTS answer_events_question ON answer_events(role, question_key);
+CREATE TABLE IF NOT EXISTS user_aggregates (user TEXT, role TEXT, attempts INTEGER, total_score INTEGER,
+                                            total_questions INTEGER, best_score INTEGER, passes INTEGER,
+                                            last_at REAL, PRIMARY KEY (user, role));
+CREATE TABLE IF NOT EXISTS question_aggregates (role TEXT, question_key TEXT, shown INTEGER, correct INTEGER,
+                                                timed INTEGER, total_seconds REAL,
+                                                PRIMARY KEY (role, question_key));
+CREATE TABLE IF NOT EXISTS log_meta (key TEXT PRIMARY KEY, value REAL);
+"""
+
+
+def question_key(role, question):
+    return hashlib.sha1(f"{role}\n{question['question']}".encode("utf-8")).hexdigest()[:16]
+
+
+# Append-only log of quiz attempts. record_* only appends to an in-memory buffer;
+# a background thread writes batches to SQLite and periodically compacts them into aggregates.
+class AttemptLog:
+    def __init__(self, path=None, flush_interval=FLUSH_INTERVAL, compact_interval=COMPACT_INTERVAL):
+        self.path = path or data_path("attempts.sqlite3")
+        self.flush_interval = flush_interval
+        self.compact_interval = compact_interval
+        self._buffer_lock = threading.Lock()
+        self._attempts = []
+        self._events = []
+        self._db_lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._last_compact = time.time()
+        self._writer = threading.Thread(target=self._run, name="attempt-log-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    # challenges: the served MCQs; answers: {position: chosen option}; seconds: optional {position: seconds}
+    def record_attempt(self, user, role, challenges, answers, started_at, submitted_at, passed, seconds=None):
+        attempt_id = uuid.uuid4().hex
+        seconds = seconds or {}
+        events = []
+        score = 0
+        for position, challenge in enumerate(challenges):
+            chosen = answers.get(position)
+            options = challenge["options"]
+            correct = chosen == challenge["answer"]
+            score += correct
+            events.append((attempt_id, user, role, question_key(role, challenge), position,
+                           options.index(chosen) if chosen in options else -1,
+                           options.index(challenge["answer"]), int(correct), seconds.get(position), submitted_at))
+        attempt = (attempt_id, user, role, score, len(challenges), int(passed), started_at, submitted_at)
+        with self._buffer_lock:
+            self._attempts.append(attempt)
+            self._events.extend(events)
+            pending = len(self._events)
+        if pending >= FLUSH_BATCH:
+            self._wake.set()
+        return attempt_id
+
+    def flush(self):
+        with self._buffer_lock:
+            attempts, self._attempts = self._attempts, []
+            events, self._events = self._events, []
+        if not attempts and not events:
+            return 0
+        try:
+            with self._db_lock:
+                self._db.executemany("INSERT OR IGNORE INTO attempts VALUES (?, ?, ?, ?, ?, ?, ?, ?)", attempts)
+                self._db.executemany(
+                    "INSERT INTO answer_events (attempt_id, user, role, question_key, position, option_index, "
+                    "correct_index, correct, seconds, ts) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", events)
+                self._db.commit()
+        except sqlite3.Error:
+            with self._db_lock:
+                self._db.rollback()
+            # Put the batch back in front of anything recorded meanwhile
+            with self._buffer_lock:
+                self._attempts[:0] = attempts
+                self._events[:0] = events
+            raise
+        return len(events)
+
+    # Roll raw rows newer than the last watermark into per-user and per-question aggregates
+    def compact(self):
+        with self._db_lock:
+            row = self._db.execute("SELECT value FROM log_meta WHERE key = 'event_watermark'").fetchone()
+            event_mark = int(row[0]) if row else 0
+            row = self._db.execute("SELECT value FROM log_meta WHERE key = 'attempt_watermark'").fetchone()
+            attempt_mark = int(row[0]) if row else 0
+            new_event_mark = self._db.execute("SELECT COALESCE(MAX(id), 0) FROM answer_events").fetchone()[0]
+            new_attempt_mark = self._db.execute("SELECT COALESCE(MAX(rowid), 0) FROM attempts").fetchone()[0]
+            self._db.execute(
+                "INSERT INTO question_aggregates (role, question_key, shown, correct, timed, total_seconds) "
+                "SELECT role, question_key, COUNT(*), SUM(correct), COUNT(seconds), COALESCE(SUM(seconds), 0) "
+                "FROM answer_events WHERE id > ? AND id <= ? GROUP BY role, question_key "
+                "ON CONFLICT(role, question_key) DO UPDATE SET shown = shown + excluded.shown, "
+                "correct = correct + excluded.correct, timed = timed + excluded.timed, "
+                "total_seconds = total_seconds + excluded.total_seconds",
+                (event_mark, new_event_mark))
+            self._db.execute(
+                "INSERT INTO user_aggregates (user, role, attempts, total_score, total_questions, best_score, passes, last_at) "
+                "SELECT user, role, COUNT(*), SUM(score), SUM(total), MAX(score), SUM(passed), MAX(submitted_at) "
+                "FROM attempts WHERE rowid > ? AND rowid <= ? GROUP BY user, role "
+                "ON CONFLICT(user, role) DO UPDATE SET attempts = attempts + excluded.attempts, "
+                "total_score = total_score + excluded.total_score, "
+                "total_questions = total_questions + excluded.total_questions, "
+                "best_score = MAX(best_score, excluded.best_score), passes = passes + excluded.passes, "
+                "last_at = MAX(last_at, excluded.last_at)",
+                (attempt_mark, new_attempt_mark))
+            self._db.executemany("INSERT OR REPLACE INTO log_meta (key, value) VALUES (?, ?)",
+                                 [("event_watermark", new_event_mark), ("attempt_watermark", new_attempt_mark)])
+            self._db.commit()
+        self._last_compact = time.time()
+
+    def _run(self):
+        while not self._stopped.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+                if time.time() - self._last_compact >= self.compact_interval:
+                    self.compact()
+            except sqlite3.Error:
+                # Keep the writer alive; the batch was re-buffered and is retried next cycle
+                pass
+
+    def close(self):
+        self._stopped.set()
+        self._wake.set()
+        self.flush()
+
+
+_default_log = None
+_default_log_lock = threading.Lock()
+
+
+def get_attempt_log():
+    global _default_log
+    if _default_log is None:
+        with _default_log_lock:
+            if _default_log is None:
+                _default_log = AttemptLog()
+    return _default_log
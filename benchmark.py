@@ -0,0 +1,243 @@
+import argparse
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from fake_watsonx import FakeWatsonx
+
+# Load-test the TaskGene pages against the local Watsonx stand-in: N AppTest sessions per page, spread over
+# worker processes, each walking the page's normal flow. Results go to data/benchmarks/ (or --out) as a
+# JSON summary plus the raw per-rerun samples as CSV; pass --baseline to compare p95 with an earlier run.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS = ("Manager.py", "Exceluser.py", "CustomerCare.py", "Developer.py")
+TIMEOUT = 120
+
+
+def _rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+# Every Manager section in turn
+def manager_flow(at):
+    yield "load", at.run
+    for nav in at.sidebar.radio[0].options:
+        yield nav, lambda nav=nav: at.sidebar.radio[0].set_value(nav).run()
+
+
+# Welcome → start the challenge → submit → retake
+def quiz_flow(at):
+    yield "load", at.run
+    yield "confirm_video", lambda: at.checkbox[0].check().run()
+    yield "start", lambda: at.button[0].click().run()
+    yield "submit", lambda: at.button[0].click().run()
+    yield "retake", lambda: at.button[-1].click().run()
+
+
+def _session_state_bytes(at):
+    total = 0
+    for key in at.session_state:
+        try:
+            total += len(json.dumps(at.session_state[key], default=str))
+        except (TypeError, ValueError):
+            pass
+    return total
+
+
+# Each session walks its flow on its own thread, so a worker's sessions overlap the way concurrent users do:
+# every session keeps its own session state while sharing the process-wide caches, pools and governor
+def _run_flow(script, flow, samples, errors):
+    while True:
+        try:
+            step, action = next(flow)
+        except StopIteration:
+            return
+        except Exception as e:
+            errors.append(f"{type(e).__name__}: {e}")
+            return
+        start = time.perf_counter()
+        try:
+            at = action()
+            failed = bool(at.exception)
+        except Exception as e:
+            errors.append(f"{step}: {type(e).__name__}: {e}")
+            failed = True
+        samples.append({"script": script, "step": step, "ms": (time.perf_counter() - start) * 1000,
+                        "error": failed})
+
+
+# AppTest is written for one run at a time: it installs a mock Runtime per script run and clears it when the
+# run ends, and recompiles the script each run (concurrent ast.parse can fail on Python 3.11). With sessions
+# overlapping, the worker falls back to the last runtime instead of none and compiles one script at a time.
+def _allow_concurrent_runs():
+    from streamlit.runtime.runtime import Runtime
+    from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+    last = []
+    compile_lock = threading.Lock()
+    get_bytecode = ScriptCache.get_bytecode
+
+    def locked_get_bytecode(self, script_path):
+        with compile_lock:
+            return get_bytecode(self, script_path)
+
+    def current(cls):
+        if cls._instance is not None:
+            last[:] = [cls._instance]
+        return cls._instance or (last[0] if last else None)
+
+    def instance(cls):
+        runtime = current(cls)
+        if runtime is None:
+            raise RuntimeError("Runtime hasn't been created!")
+        return runtime
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(lambda cls: current(cls) is not None)
+    ScriptCache.get_bytecode = locked_get_bytecode
+
+
+def run_sessions(script, sessions):
+    from streamlit.testing.v1 import AppTest
+    sys.path.insert(0, ROOT)
+    _allow_concurrent_runs()
+    rss_before = _rss_mb()
+    tests = [AppTest.from_file(os.path.join(ROOT, script), default_timeout=TIMEOUT) for _ in range(sessions)]
+    flows = [(manager_flow if script == "Manager.py" else quiz_flow)(at) for at in tests]
+    samples = []
+    errors = []
+    threads = [threading.Thread(target=_run_flow, args=(script, flow, samples, errors), name=f"session-{i}")
+               for i, flow in enumerate(flows)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, {
+        "rss_growth_mb": _rss_mb() - rss_before,
+        "session_state_bytes": [_session_state_bytes(at) for at in tests],
+        "session_errors": errors,
+    }
+
+
+# Workers are separate processes (each with its own Streamlit runtime) so their sessions hit the upstream in parallel
+def run_script(script, sessions, processes):
+    per_worker = [sessions // processes + (1 if i < sessions % processes else 0) for i in range(processes)]
+    started = time.perf_counter()
+    if processes == 1:
+        results = [run_sessions(script, sessions)]
+    else:
+        with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("spawn")) as pool:
+            results = list(pool.map(run_sessions, [script] * processes, per_worker))
+    elapsed = time.perf_counter() - started
+    samples = [sample for worker_samples, _ in results for sample in worker_samples]
+    state_bytes = [size for _, extra in results for size in extra["session_state_bytes"]]
+    return samples, {
+        "wall_seconds": round(elapsed, 3),
+        "rss_growth_mb_per_session": round(sum(extra["rss_growth_mb"] for _, extra in results) / sessions, 3),
+        "session_state_bytes": int(np.mean(state_bytes)) if state_bytes else None,
+        "session_errors": [error for _, extra in results for error in extra["session_errors"]],
+    }
+
+
+def summarize(samples):
+    ms = np.array([s["ms"] for s in samples])
+    if ms.size == 0:
+        return {"reruns": 0}
+    return {
+        "reruns": int(ms.size),
+        "p50_ms": round(float(np.percentile(ms, 50)), 1),
+        "p95_ms": round(float(np.percentile(ms, 95)), 1),
+        "p99_ms": round(float(np.percentile(ms, 99)), 1),
+        "max_ms": round(float(ms.max()), 1),
+        "script_errors": int(sum(s["error"] for s in samples)),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Side-by-side p95 against an earlier results file
+def compare(report, baseline_path):
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    lines = [f"vs {baseline['commit']} ({os.path.basename(baseline_path)}):"]
+    for script, result in report["scripts"].items():
+        before = baseline["scripts"].get(script, {}).get("latency", {}).get("p95_ms")
+        after = result["latency"].get("p95_ms")
+        if before and after:
+            lines.append(f"  {script:<18} p95 {before:>8.1f} → {after:>8.1f} ms ({(after - before) / before:+.0%})")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the TaskGene pages against a fake Watsonx")
+    parser.add_argument("--sessions", type=int, default=5, help="simulated sessions per page")
+    parser.add_argument("--processes", type=int, default=1, help="worker processes the sessions are spread over")
+    parser.add_argument("--scripts", nargs="+", default=list(SCRIPTS))
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--out", help="results directory (default: data/benchmarks)")
+    parser.add_argument("--baseline", help="earlier results JSON to compare p95 against")
+    args = parser.parse_args()
+
+    fake = FakeWatsonx(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                       reply_tokens=args.reply_tokens, error_rate=args.error_rate).start()
+    # The app modules read these at import, so set them before any AppTest run imports them.
+    # A scratch data dir keeps caches from earlier runs (or real use) from hiding upstream calls.
+    os.environ["WATSONX_URL"] = fake.url
+    os.environ["WATSONX_IAM_URL"] = fake.url + "/identity/token"
+    os.environ.setdefault("TASKGENE_DATA_DIR", tempfile.mkdtemp(prefix="taskgene-bench-"))
+    out_dir = args.out or os.path.join(ROOT, "data", "benchmarks")
+    os.makedirs(out_dir, exist_ok=True)
+    sys.path.insert(0, ROOT)
+
+    report = {"commit": _git_commit(), "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "config": vars(args), "scripts": {}}
+    all_samples = []
+    for script in args.scripts:
+        calls_before = dict(fake.counts)
+        samples, extra = run_script(script, args.sessions, min(args.processes, args.sessions))
+        calls = {name: fake.counts[name] - calls_before[name] for name in fake.counts}
+        upstream = calls["generation"] + calls["generation_stream"]
+        report["scripts"][script] = {
+            "latency": summarize(samples),
+            "upstream_calls": calls,
+            "upstream_calls_per_session": round(upstream / args.sessions, 2),
+            **extra,
+        }
+        all_samples.extend(samples)
+        print(f"{script:<18} {report['scripts'][script]['latency']}  upstream={calls}")
+    fake.stop()
+
+    stem = os.path.join(out_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}")
+    with open(stem + ".json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    with open(stem + ".csv", "w", encoding="utf-8") as f:
+        f.write("script,step,ms,error\n")
+        f.writelines(f"{s['script']},\"{s['step']}\",{s['ms']:.2f},{int(s['error'])}\n" for s in all_samples)
+    print(f"Saved {stem}.json and {stem}.csv")
+    if args.baseline:
+        print(compare(report, args.baseline))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+from telemetry import ContextExecutor
+from watsonx_client import send_chunk_to_watsonx
+
+# Rough budget per request; mistral-large has a 32k context and we leave room for the answer
+MAX_CHUNK_TOKENS = 6000
+CHARS_PER_TOKEN = 4
+
+# Separate pool for map steps so a map-reduce job submitted to the insight pool can't starve itself
+_map_executor = ContextExecutor(max_workers=8, thread_name_prefix="watsonx-map")
+
+REDUCE_PREFIX = ("The following are partial analyses of consecutive slices of one team dataset. "
+                 "Merge them into a single answer to the original request, recomputing overall "
+                 "highest, lowest and average values from the partial figures where asked.\n"
+                 "Original request: {request}\n\nPartial analyses:\n")
+
+
+def estimate_tokens(text):
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+# Cut a DataFrame's CSV into row chunks that each fit the token budget; every chunk repeats the header
+def chunk_dataframe(df, max_tokens=MAX_CHUNK_TOKENS, index=False):
+    lines = df.to_csv(index=index).splitlines(keepends=True)
+    header, rows = lines[0], lines[1:]
+    budget = max_tokens - estimate_tokens(header)
+    chunks = []
+    current = []
+    used = 0
+    for row in rows:
+        cost = estimate_tokens(row)
+        if current and used + cost > budget:
+            chunks.append(header + "".join(current))
+            current = []
+            used = 0
+        current.append(row)
+        used += cost
+    if current or not chunks:
+        chunks.append(header + "".join(current))
+    return chunks
+
+
+def chunks_for_prompt(df, prompt_prefix, index=False, max_tokens=MAX_CHUNK_TOKENS):
+    return chunk_dataframe(df, max_tokens - estimate_tokens(prompt_prefix), index=index)
+
+
+def _chunk_texts(texts, max_tokens):
+    chunks = []
+    current = ""
+    for text in texts:
+        if current and estimate_tokens(current + text) > max_tokens:
+            chunks.append(current)
+            current = ""
+        current += text
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def reduce_partials(partials, access_token, prompt_prefix, max_tokens=MAX_CHUNK_TOKENS):
+    reduce_prefix = REDUCE_PREFIX.format(request=prompt_prefix.strip())
+    numbered = [f"--- Slice {i + 1} ---\n{text.strip()}\n" for i, text in enumerate(partials)]
+    groups = _chunk_texts(numbered, max_tokens - estimate_tokens(reduce_prefix))
+    if len(groups) >= len(numbered) > 1:
+        # Partials are individually too long to pack; merge them pairwise so each round shrinks
+        groups = ["".join(numbered[i:i + 2]) for i in range(0, len(numbered), 2)]
+    if len(groups) == 1:
+        return send_chunk_to_watsonx(groups[0], access_token, reduce_prefix)
+    # Too many partials for one prompt: reduce in parallel groups, then reduce again
+    merged = list(_map_executor.map(lambda group: send_chunk_to_watsonx(group, access_token, reduce_prefix), groups))
+    return reduce_partials(merged, access_token, prompt_prefix, max_tokens)
+
+
+# Map-reduce a DataFrame through Watsonx: one prompt if it fits, otherwise summarize chunks in parallel and merge
+def map_reduce_insight(df, access_token, prompt_prefix, index=False, max_tokens=MAX_CHUNK_TOKENS):
+    chunks = chunks_for_prompt(df, prompt_prefix, index, max_tokens)
+    if len(chunks) == 1:
+        return send_chunk_to_watsonx(chunks[0], access_token, prompt_prefix)
+    partials = list(_map_executor.map(lambda chunk: send_chunk_to_watsonx(chunk, access_token, prompt_prefix), chunks))
+    return reduce_partials(partials, access_token, prompt_prefix, max_tokens)
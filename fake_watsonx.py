@@ -0,0 +1,159 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Local stand-in for IBM IAM and the Watsonx text-generation endpoints, for load tests without real quota.
+# Point the apps at it with WATSONX_URL=http://host:port and WATSONX_IAM_URL=http://host:port/identity/token
+
+WORDS = ("team engagement improves when monotony drops and members rotate into creative work while "
+         "productivity holds steady across the quarter").split()
+
+
+# Plausible replies for the structured prompts the apps send, so load tests exercise the happy paths
+def fake_reply(prompt_input, max_tokens):
+    if "Return ONLY a JSON array" in prompt_input:
+        count = int(re.search(r"write (\d+) multiple-choice", prompt_input).group(1))
+        stamp = random.randrange(10 ** 9)
+        return json.dumps([{"question": f"Generated question {stamp}-{i} about automating this work?",
+                            "options": ["A. Macro", "B. Script", "C. Template", "D. Manual"],
+                            "answer": "B. Script"} for i in range(count)])
+    keys = re.search(r"exactly these keys: (\[.*?\])", prompt_input)
+    if keys:
+        return json.dumps({key: f"Packed insight for {key}." for key in json.loads(keys.group(1))}, indent=1)
+    if "mapping each member's exact name" in prompt_input:
+        names = re.findall(r"^- ([^:\n]+):", prompt_input, re.MULTILINE)
+        return json.dumps({name: f"{name} is steady; suggest a stretch project." for name in names})
+    return " ".join(WORDS[i % len(WORDS)] for i in range(max_tokens))
+
+
+class FakeWatsonx:
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, tokens_per_second=200.0, reply_tokens=60,
+                 error_rate=0.0, error_status=503, token_ttl=3600):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.reply_tokens = reply_tokens
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.token_ttl = token_ttl
+        self.counts = {"iam": 0, "generation": 0, "generation_stream": 0, "errors": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def _send_json(self, status, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path == "/stats":
+                    with fake._lock:
+                        self._send_json(200, dict(fake.counts))
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                if self.path.startswith("/identity/token"):
+                    fake._count("iam")
+                    self._send_json(200, {"access_token": f"fake-{random.randrange(10 ** 9)}",
+                                          "expires_in": fake.token_ttl})
+                    return
+                stream = self.path.startswith("/ml/v1/text/generation_stream")
+                if not stream and not self.path.startswith("/ml/v1/text/generation"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                fake._count("generation_stream" if stream else "generation")
+                if random.random() < fake.error_rate:
+                    fake._count("errors")
+                    self._send_json(fake.error_status, {"errors": [{"message": "injected failure"}]})
+                    return
+                payload = json.loads(body)
+                max_tokens = min(payload.get("parameters", {}).get("max_new_tokens", fake.reply_tokens),
+                                 fake.reply_tokens)
+                text = fake_reply(payload.get("input", ""), max_tokens)
+                input_tokens = len(payload.get("input", "")) // 4
+                time.sleep(fake.latency)
+                if stream:
+                    self._stream(text, input_tokens)
+                else:
+                    tokens = len(text.split())
+                    time.sleep(tokens / fake.tokens_per_second)
+                    self._send_json(200, {"results": [{"generated_text": text, "input_token_count": input_tokens,
+                                                       "generated_token_count": tokens}]})
+
+            # One SSE event per word, paced at the configured token rate
+            def _stream(self, text, input_tokens):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                words = text.split(" ")
+                for i, word in enumerate(words):
+                    piece = word if i == 0 else " " + word
+                    event = {"results": [{"generated_text": piece, "input_token_count": input_tokens,
+                                          "generated_token_count": i + 1}]}
+                    self.wfile.write(f"id: {i}\nevent: message\ndata: {json.dumps(event)}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(1 / fake.tokens_per_second)
+                self.close_connection = True
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True, name="fake-watsonx")
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake IBM IAM + Watsonx text generation server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0)
+    parser.add_argument("--reply-tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of generation calls that fail")
+    parser.add_argument("--error-status", type=int, default=503)
+    args = parser.parse_args()
+    fake = FakeWatsonx(args.host, args.port, args.latency, args.tokens_per_second, args.reply_tokens,
+                       args.error_rate, args.error_status)
+    print(f"Fake Watsonx listening on {fake.url}")
+    try:
+        fake._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from telemetry import get_telemetry, span
+
+MAX_FIGURES = 128
+
+
+def _update_hash(digest, value):
+    if isinstance(value, pd.DataFrame):
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+        digest.update(json.dumps([str(c) for c in value.columns]).encode("utf-8"))
+    elif isinstance(value, pd.Series):
+        digest.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        digest.update(str(value.dtype).encode("utf-8"))
+        digest.update(np.ascontiguousarray(value).tobytes() if value.dtype != object else repr(value.tolist()).encode("utf-8"))
+    elif isinstance(value, (list, tuple)):
+        digest.update(b"[")
+        for item in value:
+            _update_hash(digest, item)
+        digest.update(b"]")
+    elif isinstance(value, dict):
+        digest.update(json.dumps(value, sort_keys=True, default=str).encode("utf-8"))
+    else:
+        digest.update(repr(value).encode("utf-8"))
+
+
+def data_fingerprint(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        _update_hash(digest, part)
+    return digest.hexdigest()
+
+
+# LRU of serialized Plotly figures keyed on chart name + spec + data hash, with per-chart timings
+class FigureCache:
+    def __init__(self, max_figures=MAX_FIGURES):
+        self.max_figures = max_figures
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.timings = {}
+
+    def get_or_build(self, name, build, data=None, spec=None):
+        key = (name, data_fingerprint(data, spec))
+        with self._lock:
+            cached = self._figures.get(key)
+            if cached is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+                self._record(name, hit=True)
+                return json.loads(cached)
+            self.misses += 1
+
+        with span("figure_build", chart=name):
+            start = time.perf_counter()
+            fig = build()
+            built = time.perf_counter()
+            serialized = fig.to_json()
+            done = time.perf_counter()
+
+        with self._lock:
+            self._figures[key] = serialized
+            self._figures.move_to_end(key)
+            while len(self._figures) > self.max_figures:
+                self._figures.popitem(last=False)
+            self._record(name, hit=False, build_ms=(built - start) * 1000, serialize_ms=(done - built) * 1000,
+                         size=len(serialized))
+        return json.loads(serialized)
+
+    def _record(self, name, hit, build_ms=None, serialize_ms=None, size=None):
+        entry = self.timings.setdefault(name, {"hits": 0, "builds": 0, "build_ms": 0.0, "serialize_ms": 0.0, "bytes": 0})
+        if hit:
+            entry["hits"] += 1
+            return
+        entry["builds"] += 1
+        entry["build_ms"] = round(build_ms, 2)
+        entry["serialize_ms"] = round(serialize_ms, 2)
+        entry["bytes"] = size
+
+    # Per-chart last build/serialize cost, most expensive first
+    def report(self):
+        rows = [dict(chart=name, **entry) for name, entry in self.timings.items()]
+        return sorted(rows, key=lambda row: row["build_ms"] + row["serialize_ms"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+
+    def metrics(self):
+        total = self.hits + self.misses
+        return {"figure_cache_hits_total": self.hits, "figure_cache_misses_total": self.misses,
+                "figure_cache_hit_ratio": round(self.hits / total, 4) if total else 0.0}
+
+
+_default_cache = FigureCache()
+get_telemetry().register_gauges("figure_cache", _default_cache.metrics)
+
+
+def get_figure_cache():
+    return _default_cache
+
+
+# Build (or reuse) a figure; `build` is a zero-argument callable, `data`/`spec` are what the chart depends on
+def cached_figure(name, build, data=None, spec=None):
+    return _default_cache.get_or_build(name, build, data, spec)
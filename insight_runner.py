@@ -0,0 +1,120 @@
+import os
+import time
+from concurrent.futures import Future, TimeoutError
+
+from telemetry import ContextExecutor, span
+from watsonx_client import ERROR_MARKER, send_chunk_to_watsonx, stream_chunk_from_watsonx
+
+# Shared pool for Watsonx calls; workers only do HTTP, all st.* calls stay on the script thread
+_executor = ContextExecutor(max_workers=8, thread_name_prefix="watsonx")
+# Batch and prefetch jobs get their own small pool, so a large refresh never queues ahead of page work
+# in _executor (the governor can only reorder requests that have already reached it)
+BACKGROUND_WORKERS = 2
+_background_executor = ContextExecutor(max_workers=BACKGROUND_WORKERS, thread_name_prefix="watsonx-background")
+
+# How long a section waits for Watsonx before showing its locally computed reading instead
+INSIGHT_BUDGET = float(os.environ.get("TASKGENE_INSIGHT_BUDGET", "1.5"))
+# Longest finish_deferred() holds the script after the page is drawn; later answers wait for the next rerun
+DEFERRED_WAIT = float(os.environ.get("TASKGENE_DEFERRED_WAIT", "10"))
+FALLBACK_TEMPLATE = "📋 Quick read (computed locally{}): {}"
+
+
+def get_executor():
+    return _executor
+
+
+def get_background_executor():
+    return _background_executor
+
+
+def submit_insight(chunk_text, access_token, prompt_prefix):
+    return _executor.submit(send_chunk_to_watsonx, chunk_text, access_token, prompt_prefix)
+
+
+# Future of fn(result) once `future` completes, without tying up a worker to wait for it
+def map_future(future, fn):
+    mapped = Future()
+
+    def done(source):
+        try:
+            mapped.set_result(fn(source.result()))
+        except Exception as e:
+            mapped.set_exception(e)
+
+    future.add_done_callback(done)
+    return mapped
+
+
+# Streams on a worker so the page can wait for it with a deadline and still show the partial text
+class StreamedInsight:
+    def __init__(self, chunk_text, access_token, prompt_prefix):
+        self.pieces = []
+        self.future = _executor.submit(self._consume, chunk_text, access_token, prompt_prefix)
+
+    def _consume(self, chunk_text, access_token, prompt_prefix):
+        for piece in stream_chunk_from_watsonx(chunk_text, access_token, prompt_prefix):
+            self.pieces.append(piece)
+        return "".join(self.pieces)
+
+    def text(self):
+        return "".join(self.pieces)
+
+
+def _show_final(placeholder, text, fallback, template):
+    if text.startswith(ERROR_MARKER):
+        placeholder.info(FALLBACK_TEMPLATE.format("; IBM Granite is unavailable right now", fallback))
+    else:
+        placeholder.info(template.format(text))
+
+
+# Sections drawn together can share one deadline, so their budgets overlap instead of adding up
+def insight_deadline(budget=INSIGHT_BUDGET):
+    return time.monotonic() + budget
+
+
+# Show the Watsonx text if it lands within the budget; otherwise show the local reading right away and
+# queue the section on `deferred` so finish_deferred() swaps the LLM text in once the page is drawn
+def budgeted_insight(placeholder, pending, fallback, deferred, deadline=None,
+                     template="🧠 IBM Granite Insight: {}"):
+    future = pending.future if isinstance(pending, StreamedInsight) else pending
+    deadline = deadline or insight_deadline()
+    with span("insight_wait", budgeted=True):
+        try:
+            text = future.result(timeout=max(deadline - time.monotonic(), 0))
+        except TimeoutError:
+            placeholder.info(FALLBACK_TEMPLATE.format("; IBM Granite insight on its way", fallback))
+            deferred.append((placeholder, pending, fallback, template))
+            return None
+        except Exception as e:
+            text = f"{ERROR_MARKER}: {str(e)}"
+    _show_final(placeholder, text, fallback, template)
+    return text
+
+
+# Called once at the end of the page: streams partial text into deferred sections and swaps in each final answer.
+# The wait is capped so a rerun is never held behind a slow call; the requests still finish and the next
+# rerun reads them from the caches.
+def finish_deferred(deferred, poll=0.1, wait=DEFERRED_WAIT):
+    shown = {}
+    deadline = time.monotonic() + wait
+    while deferred and time.monotonic() < deadline:
+        for entry in list(deferred):
+            placeholder, pending, fallback, template = entry
+            future = pending.future if isinstance(pending, StreamedInsight) else pending
+            if future.done():
+                try:
+                    text = future.result()
+                except Exception as e:
+                    text = f"{ERROR_MARKER}: {str(e)}"
+                _show_final(placeholder, text, fallback, template)
+                deferred.remove(entry)
+            elif isinstance(pending, StreamedInsight):
+                partial = pending.text()
+                if partial and shown.get(id(entry)) != len(partial):
+                    shown[id(entry)] = len(partial)
+                    placeholder.info(template.format(partial + "▌"))
+        if deferred:
+            time.sleep(poll)
+    for placeholder, pending, fallback, template in deferred:
+        placeholder.info(FALLBACK_TEMPLATE.format("; IBM Granite insight will show on the next refresh", fallback))
+    deferred.clear()
@@ -0,0 +1,186 @@
+import ast
+import json
+import threading
+import time
+from concurrent.futures import Future
+
+import pandas as pd
+
+from chunking import MAX_CHUNK_TOKENS, estimate_tokens, map_reduce_insight
+from insight_runner import get_background_executor, get_executor, map_future
+from scheduler import BATCH, request_priority
+from watsonx_client import ERROR_MARKER, is_fallback, send_chunk_to_watsonx
+
+# Members packed into one Watsonx request; small enough that the JSON reply stays well under the token budget.
+# Batches also close early once their profiles would overflow one prompt (members with very many skills).
+BATCH_SIZE = 4
+MAX_AGE_SECONDS = 24 * 3600
+
+MEMBER_PREFIX = ("Given this team member’s monotony, productivity, and skill data, summarize engagement status "
+                 "and suggest a short development path using IBM Granite AI.:\n")
+BATCH_PREFIX = ("For each team member below, use their monotony, productivity, and skill data to summarize "
+                "engagement status and suggest a short development path using IBM Granite AI.\n"
+                "Return ONLY a JSON object mapping each member's exact name to their insight as one string.\n\n")
+
+
+def member_profile(monotony, productivity, skills):
+    return f"Monotony: {monotony}, Productivity: {productivity}, Skills: {skills}"
+
+
+# One member on their own; a profile too long for one prompt is map-reduced as a table of their skill levels
+def member_request(profile, access_token):
+    if estimate_tokens(MEMBER_PREFIX + profile) <= MAX_CHUNK_TOKENS:
+        return send_chunk_to_watsonx(profile, access_token, MEMBER_PREFIX)
+    scores, _, skills = profile.partition(", Skills: ")
+    levels = pd.DataFrame(list(ast.literal_eval(skills).items()), columns=["skill", "level"])
+    return map_reduce_insight(levels, access_token, f"{MEMBER_PREFIX}{scores}\nSkill levels:\n")
+
+
+def _batch_text(profiles):
+    return "\n".join(f"- {name}: {profile}" for name, profile in profiles.items())
+
+
+def _fits_batch(profiles):
+    return estimate_tokens(BATCH_PREFIX + _batch_text(profiles)) <= MAX_CHUNK_TOKENS
+
+
+# Pull {name: insight} out of a model reply, keeping only the requested names
+def parse_batch(text, names):
+    start = text.find("{")
+    end = text.rfind("}")
+    if start == -1 or end <= start:
+        return {}
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+    if not isinstance(items, dict):
+        return {}
+    return {name: items[name].strip() for name in names if isinstance(items.get(name), str) and items[name].strip()}
+
+
+# Per-member insight cache filled by batched background requests; entries go stale when the
+# member's data changes or they age out, and are then recomputed while the old text keeps serving
+class MemberInsights:
+    def __init__(self, batch_size=BATCH_SIZE, max_age=MAX_AGE_SECONDS):
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self._entries = {}
+        self._futures = {}
+        self._lookups = {}
+        self._lock = threading.Lock()
+
+    def _fresh(self, name, profile):
+        entry = self._entries.get(name)
+        return entry is not None and entry[0] == profile and time.time() - entry[2] < self.max_age
+
+    def get(self, name):
+        with self._lock:
+            entry = self._entries.get(name)
+        return entry[1] if entry else None
+
+    def _store(self, results, profiles):
+        now = time.time()
+        with self._lock:
+            # Error and last-known replies are returned but not cached, so the next refresh retries them
+            for name, text in results.items():
+                if not is_fallback(text):
+                    self._entries[name] = (profiles[name], text, now)
+
+    def _run_batch(self, profiles, access_token):
+        names = list(profiles)
+        try:
+            # Members looked up on their own while this batch was queued are already done
+            with self._lock:
+                done = {name: self._entries[name][1] for name in names if self._fresh(name, profiles[name])}
+            pending = {name: profile for name, profile in profiles.items() if name not in done}
+            results = {}
+            with request_priority(BATCH):
+                # A lone member too long for a batch prompt goes straight to the chunked path
+                if pending and _fits_batch(pending):
+                    reply = send_chunk_to_watsonx(_batch_text(pending), access_token, BATCH_PREFIX)
+                    # A last-known batch reply is only a stand-in; each member then gets their own (marked) answer
+                    results = {} if is_fallback(reply) else parse_batch(reply, list(pending))
+                # Anything the batch reply dropped or mangled gets its own request
+                for name in pending:
+                    if name not in results:
+                        results[name] = member_request(pending[name], access_token)
+            self._store(results, profiles)
+            return {**results, **done}
+        finally:
+            with self._lock:
+                for name in names:
+                    self._futures.pop(name, None)
+
+    # Queue every stale member, a few per request; members already in flight are not requeued
+    def refresh(self, profiles, access_token):
+        with self._lock:
+            stale = {name: profile for name, profile in profiles.items()
+                     if not self._fresh(name, profile) and name not in self._futures}
+            batches = []
+            for name, profile in stale.items():
+                if batches and len(batches[-1]) < self.batch_size and _fits_batch({**batches[-1], name: profile}):
+                    batches[-1][name] = profile
+                else:
+                    batches.append({name: profile})
+            for batch in batches:
+                future = get_background_executor().submit(self._run_batch, batch, access_token)
+                for name in batch:
+                    self._futures[name] = future
+
+    # The selected member on their own at interactive priority, for when their batch is still queued
+    def _lookup(self, name, profile, access_token):
+        try:
+            text = member_request(profile, access_token)
+            self._store({name: text}, {name: profile})
+            return text
+        finally:
+            with self._lock:
+                self._lookups.pop(name, None)
+
+    # Future of the member's text: already resolved when cached, tied to the member's batch once it has
+    # started, otherwise a request of its own so the lookup never waits behind the background queue
+    def insight_future(self, name, profile, access_token):
+        with self._lock:
+            entry = self._entries.get(name)
+            future = self._futures.get(name)
+        if entry is not None:
+            resolved = Future()
+            resolved.set_result(entry[1])
+            return resolved
+        if future is None:
+            self.refresh({name: profile}, access_token)
+            with self._lock:
+                future = self._futures.get(name)
+        if future is None:
+            # The batch finished between the two lookups
+            resolved = Future()
+            resolved.set_result(self.get(name) or f"{ERROR_MARKER}: no insight for {name}")
+            return resolved
+        if future.running() or future.done():
+            return map_future(future, lambda results: results[name])
+        with self._lock:
+            lookup = self._lookups.get(name)
+            if lookup is None:
+                lookup = self._lookups[name] = get_executor().submit(self._lookup, name, profile, access_token)
+        return lookup
+
+    # Cached text right away when there is one; otherwise wait for the member's batch
+    def insight(self, name, profile, access_token):
+        try:
+            return self.insight_future(name, profile, access_token).result()
+        except Exception as e:
+            return f"{ERROR_MARKER}: {str(e)}"
+
+
+_default_insights = None
+_default_insights_lock = threading.Lock()
+
+
+def get_member_insights():
+    global _default_insights
+    if _default_insights is None:
+        with _default_insights_lock:
+            if _default_insights is None:
+                _default_insights = MemberInsights()
+    return _default_insights
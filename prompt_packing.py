@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from insight_runner import get_executor
+from response_cache import get_response_cache
+from telemetry import ContextExecutor
+from watsonx_client import generation_parameters, is_fallback, send_chunk_to_watsonx
+
+# Short insights end at two blank lines in a row (single blank lines between paragraphs are kept);
+# a packed reply ends with its closing brace
+SECTION_STOP = ["\n\n\n"]
+PACK_STOP = ["\n}"]
+# Extra room per packed task for its JSON key and quoting
+PACK_OVERHEAD_TOKENS = 20
+# Recent packs kept for reuse across sections and sessions, each until the response cache's TTL runs out
+MAX_PACKS = 32
+
+# Fallback calls are issued from inside a pack job, so they get their own pool to avoid starving the shared one
+_fallback_executor = ContextExecutor(max_workers=4, thread_name_prefix="watsonx-unpack")
+
+PACK_PREFIX = ("Complete each task below independently. Each task has an instruction and its data.\n"
+               "Return ONLY a JSON object with exactly these keys: {keys}. Each value must be that task's answer "
+               "as one plain string.\n\n")
+
+
+def prompt(text, prefix, max_new_tokens):
+    return {"text": text, "prefix": prefix, "max_new_tokens": max_new_tokens}
+
+
+def pack_input(prompts):
+    return "\n".join(f"### {key}\nInstruction: {p['prefix'].strip()}\nData: {p['text']}\n" for key, p in prompts.items())
+
+
+# {key: answer} from a packed reply; only non-empty string answers for the requested keys count
+def parse_packed(text, keys):
+    start = text.find("{")
+    if start == -1:
+        return {}
+    body = text[start:text.rfind("}") + 1] if text.rfind("}") > start else text[start:]
+    # The stop sequence may cut the closing brace off
+    for candidate in (body, body + "}", body + "\n}"):
+        try:
+            items = json.loads(candidate)
+        except ValueError:
+            continue
+        if isinstance(items, dict):
+            return {key: items[key].strip() for key in keys
+                    if isinstance(items.get(key), str) and items[key].strip()}
+    return {}
+
+
+def _send_one(p, access_token):
+    return send_chunk_to_watsonx(p["text"], access_token, p["prefix"],
+                                 parameters=generation_parameters(p["max_new_tokens"], SECTION_STOP))
+
+
+# One Watsonx call for all prompts; any answer that is missing or malformed falls back to its own call
+def run_packed(prompts, access_token):
+    keys = list(prompts)
+    budget = sum(p["max_new_tokens"] + PACK_OVERHEAD_TOKENS for p in prompts.values())
+    reply = send_chunk_to_watsonx(pack_input(prompts), access_token, PACK_PREFIX.format(keys=json.dumps(keys)),
+                                  parameters=generation_parameters(budget, PACK_STOP))
+    # Parsing a last-known pack would strip its marker, so a stand-in reply sends every prompt on its own
+    results = {} if is_fallback(reply) else parse_packed(reply, keys)
+    missing = [key for key in keys if key not in results]
+    if missing:
+        futures = {key: _fallback_executor.submit(_send_one, prompts[key], access_token) for key in missing}
+        results.update({key: future.result() for key, future in futures.items()})
+    return results
+
+
+_packs = OrderedDict()
+_packs_lock = threading.Lock()
+
+
+def _pack_key(prompts):
+    return hashlib.sha256(json.dumps(prompts, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+# Finished packs that raised or carry an error or last-known reply are retried rather than reused
+def _failed(future):
+    if not future.done():
+        return False
+    if future.exception() is not None:
+        return True
+    return any(is_fallback(text) for text in future.result().values())
+
+
+# A finished pack is only reused as long as the response cache would have kept its answers
+def _expired(entry):
+    finished_at = entry[1]
+    return finished_at is not None and time.time() - finished_at >= get_response_cache().ttl_seconds
+
+
+def _new_pack(prompts, access_token):
+    entry = [get_executor().submit(run_packed, prompts, access_token), None]
+
+    def finished(future):
+        entry[1] = time.time()
+
+    entry[0].add_done_callback(finished)
+    return entry
+
+
+# Shared future per distinct set of prompts, so every section and session asking for the same pack waits on one call
+def submit_packed(prompts, access_token):
+    key = _pack_key(prompts)
+    with _packs_lock:
+        entry = _packs.get(key)
+        if entry is None or _failed(entry[0]) or _expired(entry):
+            entry = _packs[key] = _new_pack(prompts, access_token)
+        _packs.move_to_end(key)
+        while len(_packs) > MAX_PACKS:
+            _packs.popitem(last=False)
+        return entry[0]
+
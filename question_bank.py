@@ -0,0 +1,289 @@
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+
+from attempt_log import question_key
+from insight_runner import get_background_executor
+from retrieval import RetrievalIndex, question_text
+from scheduler import PREFETCH, request_priority
+from storage import data_path
+from watsonx_client import get_ibm_access_token, is_fallback, send_chunk_to_watsonx
+
+# Keep this many generated challenge sets queued per role
+READY_SETS = 1
+# Banks at least this large keep their retrieval index on disk and memory-map it
+MMAP_MIN_QUESTIONS = 10_000
+# Recent bank questions listed in the generation prompt so the model writes new ones
+AVOID_QUESTIONS = 20
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS questions (id INTEGER PRIMARY KEY, role TEXT NOT NULL, question TEXT NOT NULL,
+                                      options TEXT NOT NULL, answer TEXT NOT NULL, source TEXT,
+                                      created_at REAL, UNIQUE (role, question));
+CREATE TABLE IF NOT EXISTS challenge_sets (id INTEGER PRIMARY KEY, role TEXT NOT NULL, question_ids TEXT NOT NULL,
+                                           status TEXT NOT NULL, created_at REAL);
+CREATE INDEX IF NOT EXISTS challenge_sets_ready ON challenge_sets(role, status, created_at);
+"""
+
+GENERATION_PROMPT = (
+    "You write short aptitude quizzes. Using the recent work history below, write {count} multiple-choice "
+    "questions on {topic} that would help this person automate or improve that work.\n"
+    "Return ONLY a JSON array. Each item must be an object with keys \"question\" (string), \"options\" "
+    "(exactly four strings prefixed \"A. \", \"B. \", \"C. \", \"D. \") and \"answer\" (one of the options, copied "
+    "exactly). Do not repeat any question listed under \"Already asked\".\n\nRecent work history:\n"
+)
+
+
+def _valid_mcq(item):
+    return (isinstance(item, dict) and isinstance(item.get("question"), str) and item["question"].strip()
+            and isinstance(item.get("options"), list) and len(item["options"]) == 4
+            and all(isinstance(o, str) for o in item["options"]) and item.get("answer") in item["options"])
+
+
+# Pull the JSON array of MCQs out of a model reply, dropping malformed items
+def parse_mcqs(text):
+    start = text.find("[")
+    end = text.rfind("]")
+    if start == -1 or end <= start:
+        return []
+    try:
+        items = json.loads(text[start:end + 1])
+    except ValueError:
+        return []
+    if not isinstance(items, list):
+        return []
+    return [{"question": i["question"].strip(), "options": i["options"], "answer": i["answer"]}
+            for i in items if _valid_mcq(i)]
+
+
+class QuestionBank:
+    def __init__(self, path=None):
+        self.path = path or data_path("question_bank.sqlite3")
+        self._lock = threading.RLock()
+        self._generating = set()
+        self._indexes = {}
+        self._indexing = set()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+
+    def add_questions(self, role, mcqs, source):
+        now = time.time()
+        with self._lock:
+            ids = []
+            for mcq in mcqs:
+                self._db.execute(
+                    "INSERT OR IGNORE INTO questions (role, question, options, answer, source, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (role, mcq["question"], json.dumps(mcq["options"]), mcq["answer"], source, now)
+                )
+                ids.append(self._db.execute("SELECT id FROM questions WHERE role = ? AND question = ?",
+                                            (role, mcq["question"])).fetchone()[0])
+            self._db.commit()
+            return ids
+
+    def seed(self, role, mcqs):
+        with self._lock:
+            if self._db.execute("SELECT 1 FROM questions WHERE role = ? LIMIT 1", (role,)).fetchone() is None:
+                self.add_questions(role, mcqs, "seed")
+
+    def get_questions(self, ids):
+        if not ids:
+            return []
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT id, question, options, answer FROM questions WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+        by_id = {row[0]: {"id": row[0], "question": row[1], "options": json.loads(row[2]), "answer": row[3]}
+                 for row in rows}
+        return [by_id[i] for i in ids if i in by_id]
+
+    def latest_questions(self, role, count):
+        with self._lock:
+            ids = [row[0] for row in self._db.execute(
+                "SELECT id FROM questions WHERE role = ? ORDER BY created_at DESC, id LIMIT ?", (role, count))]
+        return self.get_questions(ids)
+
+    def all_questions(self, role):
+        with self._lock:
+            rows = self._db.execute("SELECT id, question, options, answer FROM questions WHERE role = ? ORDER BY id",
+                                    (role,)).fetchall()
+        return [{"id": row[0], "question": row[1], "options": json.loads(row[2]), "answer": row[3]} for row in rows]
+
+    # {(role, question_key): question text} for labelling attempt-log analytics
+    def question_texts(self):
+        with self._lock:
+            rows = self._db.execute("SELECT role, question FROM questions").fetchall()
+        return {(role, question_key(role, {"question": text})): text for role, text in rows}
+
+    def ready_count(self, role):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM challenge_sets WHERE role = ? AND status = 'ready'",
+                                    (role,)).fetchone()[0]
+
+    def _queue_set(self, role, ids):
+        with self._lock:
+            self._db.execute("INSERT INTO challenge_sets (role, question_ids, status, created_at) VALUES (?, ?, 'ready', ?)",
+                             (role, json.dumps(ids), time.time()))
+            self._db.commit()
+
+    def _take_ready_set(self, role):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, question_ids FROM challenge_sets WHERE role = ? AND status = 'ready' "
+                "ORDER BY created_at LIMIT 1", (role,)).fetchone()
+            if row is None:
+                return None
+            self._db.execute("UPDATE challenge_sets SET status = 'served' WHERE id = ?", (row[0],))
+            self._db.commit()
+        return self.get_questions(json.loads(row[1]))
+
+    # Ids that have already been queued or served in a challenge set for this role
+    def _used_ids(self, role):
+        with self._lock:
+            rows = self._db.execute("SELECT question_ids FROM challenge_sets WHERE role = ?", (role,)).fetchall()
+        return {i for row in rows for i in json.loads(row[0])}
+
+    # Call Watsonx with the user's task history and store the resulting MCQs as a ready set.
+    # Each call must produce new questions, so the response cache is bypassed and the prompt lists the
+    # bank's recent questions; a set with nothing new in it is not queued again.
+    def generate_questions_with_granite(self, role, topic, history, count):
+        history_text = "\n".join(f"- {item['date']}: {item['task']}" for item in history)
+        asked = "\n".join(f"- {q['question']}" for q in self.latest_questions(role, AVOID_QUESTIONS))
+        reply = send_chunk_to_watsonx(f"{history_text}\n\nAlready asked:\n{asked or '- none'}", get_ibm_access_token(),
+                                      GENERATION_PROMPT.format(count=count, topic=topic), use_cache=False)
+        if is_fallback(reply):
+            return []
+        mcqs = parse_mcqs(reply)[:count]
+        if len(mcqs) < count:
+            return []
+        ids = self.add_questions(role, mcqs, "granite")
+        used = self._used_ids(role)
+        fresh = [i for i in ids if i not in used]
+        if not fresh:
+            return []
+        self._queue_set(role, fresh + [i for i in ids if i in used][:count - len(fresh)])
+        return mcqs
+
+    # Top up the ready queue in the background; at most one generation per role at a time
+    def prefetch(self, role, topic, history, count):
+        with self._lock:
+            if role in self._generating or self.ready_count(role) >= READY_SETS:
+                return None
+            self._generating.add(role)
+
+        def run():
+            try:
+                with request_priority(PREFETCH):
+                    return self.generate_questions_with_granite(role, topic, history, count)
+            finally:
+                with self._lock:
+                    self._generating.discard(role)
+
+        return get_background_executor().submit(run)
+
+    def question_count(self, role):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM questions WHERE role = ?", (role,)).fetchone()[0]
+
+    # Newest complete on-disk index for a role; each rebuild gets its own numbered directory
+    def _latest_index_dir(self, role):
+        root = data_path(f"retrieval_{role}")
+        if not os.path.isdir(root):
+            return None
+        versions = [name for name in os.listdir(root) if name.isdigit()]
+        return os.path.join(root, max(versions, key=int)) if versions else None
+
+    # Older versions may still be mapped by a reader; where the OS refuses, the next rebuild retries
+    def _prune_index_dirs(self, role, keep):
+        root = data_path(f"retrieval_{role}")
+        for name in os.listdir(root):
+            if name.isdigit() and os.path.join(root, name) != keep:
+                shutil.rmtree(os.path.join(root, name), ignore_errors=True)
+
+    # A rebuild never writes into a directory the live index has mapped: it is saved to a staging
+    # directory, renamed into a fresh version, and only then swapped in
+    def _build_index(self, role):
+        questions = self.all_questions(role)
+        index = RetrievalIndex.build([question_text(q) for q in questions], [q["id"] for q in questions])
+        directory = None
+        if index.size >= MMAP_MIN_QUESTIONS:
+            root = data_path(f"retrieval_{role}")
+            os.makedirs(root, exist_ok=True)
+            staging = tempfile.mkdtemp(prefix=".build-", dir=root)
+            try:
+                index.save(staging)
+                directory = os.path.join(root, str(time.time_ns()))
+                os.replace(staging, directory)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+            index = RetrievalIndex.load(directory)
+        with self._lock:
+            self._indexes[role] = index
+        if directory:
+            self._prune_index_dirs(role, directory)
+        return index
+
+    # Built once per role (or mapped from disk); when the bank grows, the previous index keeps
+    # serving while the new one is rebuilt in the background
+    def retrieval_index(self, role):
+        count = self.question_count(role)
+        with self._lock:
+            index = self._indexes.get(role)
+            if index is None and count >= MMAP_MIN_QUESTIONS:
+                directory = self._latest_index_dir(role)
+                if directory:
+                    index = self._indexes[role] = RetrievalIndex.load(directory)
+            if index is not None and (index.size == count or role in self._indexing):
+                return index
+            self._indexing.add(role)
+
+        def run():
+            try:
+                return self._build_index(role)
+            finally:
+                with self._lock:
+                    self._indexing.discard(role)
+
+        if index is None:
+            return run()
+        get_background_executor().submit(run)
+        return index
+
+    # Top-k questions most similar to the user's recent tasks, no LLM call
+    def relevant_questions(self, role, history, count):
+        query = "\n".join(item["task"] for item in history)
+        ids, _ = self.retrieval_index(role).search(query, count)
+        return self.get_questions([int(i) for i in ids])
+
+    # Serve a challenge immediately from the bank, then refill the queue in the background
+    def next_challenge(self, role, topic, history, seed_mcqs):
+        self.seed(role, seed_mcqs)
+        count = len(seed_mcqs)
+        challenge = self._take_ready_set(role)
+        if not challenge:
+            # Fill any shortfall from the newest questions so the quiz length stays fixed
+            challenge = self.relevant_questions(role, history, count)
+            seen = {q["id"] for q in challenge}
+            challenge += [q for q in self.latest_questions(role, count * 2) if q["id"] not in seen]
+            challenge = challenge[:count] or seed_mcqs
+        self.prefetch(role, topic, history, count)
+        return challenge
+
+
+_default_bank = None
+_default_bank_lock = threading.Lock()
+
+
+def get_question_bank():
+    global _default_bank
+    if _default_bank is None:
+        with _default_bank_lock:
+            if _default_bank is None:
+                _default_bank = QuestionBank()
+    return _default_bank
@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from attempt_log import get_attempt_log
+
+LOAD_BATCH = 200_000
+SCORE_BINS = np.linspace(0, 100, 11)
+
+
+# Columnar copy of the attempt log that only reads rows added since the last load
+class AttemptColumns:
+    def __init__(self, path):
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self.event_mark = 0
+        self.attempt_mark = 0
+        self.events = {name: np.array([], dtype=dtype) for name, dtype in
+                       [("attempt_id", object), ("role", object), ("question_key", object),
+                        ("option_index", np.int16), ("correct_index", np.int16), ("correct", np.int8)]}
+        self.attempts = pd.DataFrame(columns=["attempt_id", "role", "score", "total", "passed"])
+
+    def refresh(self):
+        changed = False
+        while True:
+            batch = pd.read_sql_query(
+                "SELECT id, attempt_id, role, question_key, option_index, correct_index, correct "
+                "FROM answer_events WHERE id > ? ORDER BY id LIMIT ?", self._db, params=(self.event_mark, LOAD_BATCH))
+            if batch.empty:
+                break
+            for name, column in self.events.items():
+                self.events[name] = np.concatenate([column, batch[name].to_numpy().astype(column.dtype)])
+            self.event_mark = int(batch["id"].iloc[-1])
+            changed = True
+        attempts = pd.read_sql_query(
+            "SELECT rowid, attempt_id, role, score, total, passed FROM attempts WHERE rowid > ? ORDER BY rowid",
+            self._db, params=(self.attempt_mark,))
+        if not attempts.empty:
+            self.attempt_mark = int(attempts["rowid"].iloc[-1])
+            self.attempts = pd.concat([self.attempts, attempts.drop(columns="rowid")], ignore_index=True)
+            changed = True
+        return changed
+
+
+# Difficulty, discrimination and distractor rates per question, in one pass over all answer events
+def question_stats(events):
+    if len(events["correct"]) == 0:
+        return pd.DataFrame(columns=["role", "question_key", "shown", "difficulty", "discrimination", "distractor_rates"])
+    q_codes, q_uniques = pd.factorize(pd.Series(events["role"]) + "\n" + pd.Series(events["question_key"]))
+    a_codes, _ = pd.factorize(events["attempt_id"])
+    correct = events["correct"].astype(float)
+    n_questions = len(q_uniques)
+
+    shown = np.bincount(q_codes, minlength=n_questions).astype(float)
+    right = np.bincount(q_codes, weights=correct, minlength=n_questions)
+
+    # Corrected item-total (point-biserial) correlation: item score vs. the rest of the attempt
+    attempt_scores = np.bincount(a_codes, weights=correct)
+    rest = attempt_scores[a_codes] - correct
+    sx = right
+    sr = np.bincount(q_codes, weights=rest, minlength=n_questions)
+    sxx = right
+    srr = np.bincount(q_codes, weights=rest * rest, minlength=n_questions)
+    sxr = np.bincount(q_codes, weights=correct * rest, minlength=n_questions)
+    denom = np.sqrt(np.clip(shown * sxx - sx ** 2, 0, None) * np.clip(shown * srr - sr ** 2, 0, None))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        discrimination = np.where(denom > 0, (shown * sxr - sx * sr) / denom, np.nan)
+
+    # Selection rate per option slot; the last column counts unanswered
+    options = int(max(events["option_index"].max(), events["correct_index"].max())) + 1
+    chosen = np.where(events["option_index"] < 0, options, events["option_index"])
+    picks = np.bincount(q_codes * (options + 1) + chosen, minlength=n_questions * (options + 1))
+    rates = picks.reshape(n_questions, options + 1) / shown[:, None]
+
+    roles, keys = zip(*(u.split("\n", 1) for u in q_uniques))
+    return pd.DataFrame({
+        "role": roles,
+        "question_key": keys,
+        "shown": shown.astype(int),
+        "difficulty": right / shown,
+        "discrimination": discrimination,
+        "distractor_rates": [np.round(row, 3).tolist() for row in rates],
+    })
+
+
+def role_stats(attempts):
+    if attempts.empty:
+        return pd.DataFrame(columns=["role", "attempts", "mean_score_pct", "pass_rate", "score_histogram"])
+    pct = attempts["score"].astype(float) / attempts["total"].astype(float).clip(lower=1) * 100
+    frame = attempts.assign(pct=pct, passed=attempts["passed"].astype(float))
+    grouped = frame.groupby("role")
+    stats = grouped.agg(attempts=("pct", "size"), mean_score_pct=("pct", "mean"), pass_rate=("passed", "mean"))
+    stats["score_histogram"] = grouped["pct"].apply(lambda s: np.histogram(s, bins=SCORE_BINS)[0].tolist())
+    return stats.reset_index()
+
+
+class QuizAnalytics:
+    def __init__(self, path=None):
+        self._columns = AttemptColumns(path or get_attempt_log().path)
+        self._lock = threading.Lock()
+        self._results = None
+
+    # Recomputed only when new rows have landed in the log
+    def results(self):
+        with self._lock:
+            if self._columns.refresh() or self._results is None:
+                self._results = {
+                    "questions": question_stats(self._columns.events),
+                    "roles": role_stats(self._columns.attempts),
+                }
+            return self._results
+
+
+_default_analytics = None
+_default_analytics_lock = threading.Lock()
+
+
+def get_quiz_analytics():
+    global _default_analytics
+    if _default_analytics is None:
+        with _default_analytics_lock:
+            if _default_analytics is None:
+                _default_analytics = QuizAnalytics()
+    return _default_analytics
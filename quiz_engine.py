@@ -0,0 +1,238 @@
+import json
+import os
+import time
+from functools import lru_cache
+
+import plotly.graph_objs as go
+import streamlit as st
+
+from activity_scores import UPSKILLING_CATEGORY, get_activity_engine
+from adaptive import AdaptiveTest, load_item_bank
+from attempt_log import get_attempt_log
+from figure_cache import cached_figure
+from question_bank import get_question_bank
+from telemetry import span
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ROLES_DIR = os.path.join(ROOT, "roles")
+QUESTION_BANKS_DIR = os.path.join(ROOT, "question_banks")
+
+ROLES = ("excel", "customer_care", "developer")
+
+
+# Role configs and seed banks are read on first use and shared by every session in the process
+@lru_cache(maxsize=None)
+def load_role_config(role):
+    with open(os.path.join(ROLES_DIR, f"{role}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=None)
+def _load_seed_questions(role):
+    with open(os.path.join(QUESTION_BANKS_DIR, f"{role}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_seed_questions(role):
+    return [dict(q) for q in _load_seed_questions(role)]
+
+
+def get_task_history(role):
+    return load_role_config(role)["history"]
+
+
+# The user's meters, scored from their activity on all-time totals. The role's task history is read into
+# the engine on first use (later calls only check that nothing new was added).
+def activity_meters(role, config):
+    engine = get_activity_engine()
+    engine.ingest_records(get_task_history(role), source=f"role:{role}", person=config["user"],
+                          category=config["topic"])
+    return engine.person_scores(config["user"], window=False)
+
+
+def _skill_pie(labels, values):
+    fig = go.Figure(data=[go.Pie(labels=labels, values=values, hole=.4)])
+    fig.update_traces(marker=dict(line=dict(color='#000000', width=2)))
+    return fig
+
+
+# before: the meters when the challenge started; current: the meters now (None shows `before` alone)
+def show_skill_productivity_meters(config, before, current=None):
+    after = current is not None
+    current = current or before
+    st.markdown(config["dashboard_title"])
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🧠 Monotony Score", f"{current['monotony']}%", delta_color="inverse",
+                  delta=f"{current['monotony'] - before['monotony']:+}%" if after else None)
+    with col2:
+        st.metric("⚙️ Productivity", f"{current['productivity']}%",
+                  delta=f"{current['productivity'] - before['productivity']:+}%" if after else None)
+    with col3:
+        st.metric(config["skill_metric"], f"{current['skill']}%",
+                  delta=f"{current['skill'] - before['skill']:+}%" if after else None)
+
+    st.markdown(config["tracker_title"])
+    labels = config["skill_labels"]
+    values = [v + (current["skill"] - before["skill"]) for v in config["skill_values"]]
+    fig = cached_figure("skill_tracker", lambda: _skill_pie(labels, values), data=(labels, values))
+    # Before and after can be identical now that the meters come from real activity
+    st.plotly_chart(fig, use_container_width=True, key=f"skill_tracker_{'after' if after else 'before'}")
+
+
+def score_answers(challenges, user_answers):
+    return sum(1 for i, challenge in enumerate(challenges) if user_answers.get(i) == challenge["answer"])
+
+
+# Per-role session state, so roles don't clobber each other when they share a multipage session
+def _quiz_state(role):
+    key = f"quiz_{role}"
+    if key not in st.session_state:
+        st.session_state[key] = {"test_started": False, "quiz_submitted": False, "user_answers": {},
+                                 "challenges": None, "started_at": None, "adaptive": None,
+                                 "shown_at": None, "seconds": {}, "passed": None, "meters_before": None}
+    return st.session_state[key]
+
+
+def _reset(state):
+    state.update(test_started=False, quiz_submitted=False, user_answers={}, challenges=None, started_at=None,
+                 adaptive=None, shown_at=None, seconds={}, passed=None, meters_before=None)
+
+
+def _welcome(role, config, state):
+    st.title(config["title"])
+    st.markdown(config["welcome"])
+    st.video(config["video"])
+
+    seed = load_seed_questions(role)
+    bank = get_question_bank()
+    # Start generating the next challenge while the video plays
+    bank.prefetch(role, config["topic"], config["history"], len(seed))
+
+    if not st.checkbox(config["video_checkbox"], key=f"{role}_video_confirmed"):
+        st.warning(config["video_warning"])
+        st.stop()
+
+    adaptive = st.toggle("⚡ Adaptive mode: stop as soon as the badge decision is clear", key=f"{role}_adaptive")
+
+    if st.button(config["generate_button"], key=f"{role}_generate"):
+        with span("quiz_start", role=role, adaptive=adaptive):
+            if adaptive:
+                bank.seed(role, seed)
+                state["adaptive"] = AdaptiveTest(load_item_bank(role), config["badge_threshold"] / len(seed))
+                state["challenges"] = []
+            else:
+                state["challenges"] = bank.next_challenge(role, config["topic"], config["history"], seed)
+        state["test_started"] = True
+        state["started_at"] = time.time()
+        state["meters_before"] = activity_meters(role, config)
+        st.rerun()
+
+
+def _quiz_form(role, config, state, challenges):
+    with st.form(f"{role}_challenge_form"):
+        for i, challenge in enumerate(challenges):
+            st.markdown(f"### {i+1}. {challenge['question']}")
+            previous = state["user_answers"].get(i)
+            default_index = challenge["options"].index(previous) if previous in challenge["options"] else 0
+            state["user_answers"][i] = st.radio(
+                "Choose one:",
+                challenge["options"],
+                key=f"{role}_q{i}",
+                index=default_index
+            )
+            st.markdown("---")
+        if st.form_submit_button(config["submit_button"]):
+            score = score_answers(challenges, state["user_answers"])
+            _submit(role, config, state, challenges, score >= config["badge_threshold"])
+
+
+# One question per rerun; the engine picks the most informative next item until the decision is confident
+def _adaptive_step(role, config, state):
+    test = state["adaptive"]
+    with span("adaptive_next_item", role=role):
+        bank = load_item_bank(role)
+        index = test.next_item(bank)
+    if index is None:
+        _submit(role, config, state, state["challenges"], test.passed())
+        return
+
+    challenge = bank.questions[index]
+    position = len(test.asked)
+    if state["shown_at"] is None:
+        state["shown_at"] = time.time()
+    st.progress(min(position / test.max_items, 1.0),
+                text=f"Question {position + 1} · up to {test.max_items}, fewer if your result is clear early")
+    with st.form(f"{role}_adaptive_form_{position}"):
+        st.markdown(f"### {position + 1}. {challenge['question']}")
+        choice = st.radio("Choose one:", challenge["options"], key=f"{role}_aq{position}")
+        if st.form_submit_button("➡️ Next"):
+            state["challenges"].append(challenge)
+            state["user_answers"][position] = choice
+            state["seconds"][position] = time.time() - state["shown_at"]
+            state["shown_at"] = None
+            test.record(bank, index, choice == challenge["answer"])
+            st.rerun()
+
+
+def _submit(role, config, state, challenges, passed):
+    state["quiz_submitted"] = True
+    state["passed"] = passed
+    # Buffered write; the attempt log persists it from its own thread
+    with span("quiz_submit", role=role):
+        get_attempt_log().record_attempt(config["user"], role, challenges, state["user_answers"],
+                                         state["started_at"], time.time(), passed, state["seconds"])
+        # The challenge itself is activity: upskilling time that counts towards the after-test meters
+        get_activity_engine().ingest_records([{
+            "person": config["user"], "date": time.strftime("%Y-%m-%d"), "task": f"{config['topic']} challenge",
+            "category": UPSKILLING_CATEGORY, "hours": (time.time() - state["started_at"]) / 3600,
+            "completed": passed,
+        }])
+    st.rerun()
+
+
+def _results(role, config, state, challenges):
+    score = score_answers(challenges, state["user_answers"])
+    st.success(f"🎉 You scored {score} out of {len(challenges)}")
+    passed = state["passed"] if state["passed"] is not None else score >= config["badge_threshold"]
+
+    if passed:
+        st.success(config["badge_message"])
+        st.balloons()
+
+    st.subheader(config["after_heading"])
+    show_skill_productivity_meters(config, state["meters_before"], activity_meters(role, config))
+
+    st.markdown(config["apply_heading"])
+    real_use = st.radio(config["apply_question"], config["apply_options"], key=f"{role}_apply_skill")
+    kind, message = config["apply_responses"][real_use]
+    getattr(st, kind)(message)
+
+    if st.button("🔁 Retake Challenge", key=f"{role}_retake"):
+        _reset(state)
+        st.rerun()
+
+
+# Render one role's full challenge flow: welcome → quiz → results
+def run_quiz(role):
+    config = load_role_config(role)
+    state = _quiz_state(role)
+
+    if not state["test_started"]:
+        _welcome(role, config, state)
+        return
+
+    st.subheader(config["before_heading"])
+    if state["meters_before"] is None:
+        state["meters_before"] = activity_meters(role, config)
+    show_skill_productivity_meters(config, state["meters_before"])
+
+    if state["adaptive"] is not None and not state["quiz_submitted"]:
+        _adaptive_step(role, config, state)
+        return
+
+    challenges = state["challenges"] or load_seed_questions(role)
+    if not state["quiz_submitted"]:
+        _quiz_form(role, config, state, challenges)
+    else:
+        _results(role, config, state, challenges)
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from storage import data_path
+from telemetry import get_telemetry
+
+
+def make_cache_key(model_id, parameters, prompt_prefix, chunk_text):
+    payload_hash = hashlib.sha256(chunk_text.encode("utf-8")).hexdigest()
+    raw = json.dumps([model_id, parameters, prompt_prefix, payload_hash], sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def prefix_hash(prompt_prefix):
+    return hashlib.sha256(prompt_prefix.encode("utf-8")).hexdigest()
+
+
+# Two-tier cache for deterministic (greedy) Watsonx completions:
+# an in-memory LRU in front of a SQLite table that survives restarts.
+class ResponseCache:
+    # Expired rows stay on disk for stale_seconds more, as last-known answers while Watsonx is down
+    def __init__(self, path=None, memory_entries=256, disk_entries=5000, ttl_seconds=7 * 24 * 3600,
+                 stale_seconds=30 * 24 * 3600):
+        self.path = path or data_path("response_cache.sqlite3")
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.stale_seconds = stale_seconds
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "writes": 0, "evictions": 0}
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, prefix TEXT, value TEXT,"
+            " created_at REAL, accessed_at REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_prefix ON responses(prefix)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses(accessed_at)")
+        self._db.commit()
+
+    def _expired(self, created_at, now):
+        return self.ttl_seconds is not None and now - created_at > self.ttl_seconds
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if not self._expired(entry[1], now):
+                    self._memory.move_to_end(key)
+                    self.stats["memory_hits"] += 1
+                    return entry[0]
+                del self._memory[key]
+
+            row = self._db.execute("SELECT value, created_at, prefix FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or self._expired(row[1], now):
+                self.stats["misses"] += 1
+                return None
+            self._db.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            self._remember(key, row[0], row[1], row[2])
+            self.stats["disk_hits"] += 1
+            return row[0]
+
+    def set(self, key, value, prompt_prefix=""):
+        now = time.time()
+        with self._lock:
+            prefix = prefix_hash(prompt_prefix)
+            self._remember(key, value, now, prefix)
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, prefix, value, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, prefix, value, now, now)
+            )
+            self.stats["writes"] += 1
+            self._evict_disk()
+            self._db.commit()
+
+    def _remember(self, key, value, created_at, prefix):
+        self._memory[key] = (value, created_at, prefix)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _evict_disk(self):
+        if self.ttl_seconds is not None:
+            self._db.execute("DELETE FROM responses WHERE created_at < ?",
+                             (time.time() - self.ttl_seconds - self.stale_seconds,))
+        count = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.disk_entries:
+            # Drop the least recently used rows
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)",
+                (count - self.disk_entries,)
+            )
+            self.stats["evictions"] += count - self.disk_entries
+
+    # Last answer stored under this exact key, even past its TTL; a degraded stand-in while Watsonx is unavailable
+    def stale(self, key):
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                return entry[0]
+            row = self._db.execute("SELECT value FROM responses WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    # Drop a single entry
+    def invalidate(self, key):
+        with self._lock:
+            self._memory.pop(key, None)
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._db.commit()
+
+    # Drop every entry produced by a given prompt (e.g. after the team data behind it changed)
+    def invalidate_prompt(self, prompt_prefix):
+        with self._lock:
+            prefix = prefix_hash(prompt_prefix)
+            for key in [k for k, entry in self._memory.items() if entry[2] == prefix]:
+                del self._memory[key]
+            removed = self._db.execute("DELETE FROM responses WHERE prefix = ?", (prefix,)).rowcount
+            self._db.commit()
+            return removed
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._db.execute("DELETE FROM responses")
+            self._db.commit()
+
+    def hit_ratio(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        total = hits + self.stats["misses"]
+        return hits / total if total else 0.0
+
+    def metrics(self):
+        metrics = {f"response_cache_{name}_total": count for name, count in self.stats.items()}
+        metrics["response_cache_hit_ratio"] = round(self.hit_ratio(), 4)
+        return metrics
+
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    global _default_cache
+    if _default_cache is None:
+        with _default_cache_lock:
+            if _default_cache is None:
+                _default_cache = ResponseCache()
+                get_telemetry().register_gauges("response_cache", _default_cache.metrics)
+    return _default_cache
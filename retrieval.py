@@ -0,0 +1,101 @@
+import os
+import re
+import zlib
+
+import numpy as np
+
+# Hashed word unigram + bigram features; no vocabulary to store or grow
+N_FEATURES = 1 << 20
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset("a an and are as at be by for from how in is it of on or the to what which with "
+                      "you your this that do does best".split())
+ARRAYS = ("indptr", "docs", "weights", "idf", "ids")
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _features(text):
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) % N_FEATURES for g in grams), dtype=np.int64, count=len(grams))
+
+
+def question_text(question):
+    return " ".join([question["question"], *question.get("options", [])])
+
+
+# TF-IDF over hashed n-grams, stored as an inverted index (feature -> postings) in flat NumPy arrays
+class RetrievalIndex:
+    def __init__(self, indptr, docs, weights, idf, ids):
+        self.indptr = indptr
+        self.docs = docs
+        self.weights = weights
+        self.idf = idf
+        self.ids = ids
+        self.size = len(ids)
+
+    # ids label each text (e.g. question ids); search returns them instead of positions
+    @classmethod
+    def build(cls, texts, ids=None):
+        ids = np.arange(len(texts), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        doc_ids = []
+        features = []
+        for i, text in enumerate(texts):
+            f = _features(text)
+            features.append(f)
+            doc_ids.append(np.full(f.size, i, dtype=np.int64))
+        n_docs = len(texts)
+        if not features or not sum(f.size for f in features):
+            return cls(np.zeros(N_FEATURES + 1, dtype=np.int64), np.array([], dtype=np.int32),
+                       np.array([], dtype=np.float32), np.ones(N_FEATURES, dtype=np.float32), ids)
+        doc_ids = np.concatenate(doc_ids)
+        features = np.concatenate(features)
+
+        # Term frequency per (doc, feature) pair
+        pairs, tf = np.unique(doc_ids * N_FEATURES + features, return_counts=True)
+        docs = pairs // N_FEATURES
+        feats = pairs % N_FEATURES
+        df = np.bincount(feats, minlength=N_FEATURES)
+        idf = (np.log((n_docs + 1) / (df + 1)) + 1).astype(np.float32)
+        weights = np.log1p(tf) * idf[feats]
+        norms = np.sqrt(np.bincount(docs, weights=weights ** 2, minlength=n_docs))
+        weights = weights / norms[docs]
+
+        # Re-sort postings by feature so each feature's docs are one contiguous slice
+        order = np.argsort(feats, kind="stable")
+        indptr = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+        return cls(indptr, docs[order].astype(np.int32), weights[order].astype(np.float32), idf, ids)
+
+    # Cosine top-k for a free-text query; touches only the postings of the query's features
+    def search(self, query, k=10):
+        features, tf = np.unique(_features(query), return_counts=True)
+        if features.size == 0 or self.size == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        q_weights = np.log1p(tf) * self.idf[features]
+        q_weights /= np.sqrt((q_weights ** 2).sum())
+        starts = self.indptr[features]
+        lengths = self.indptr[features + 1] - starts
+        if not lengths.sum():
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+        scores = np.bincount(self.docs[positions], weights=self.weights[positions] * np.repeat(q_weights, lengths),
+                             minlength=self.size)
+        k = min(k, int((scores > 0).sum()))
+        if k == 0:
+            return np.array([], dtype=np.int64), np.array([], dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return np.asarray(self.ids[top]), scores[top]
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        for name in ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(self, name))
+
+    # Memory-mapped load: large banks are paged in on demand instead of read up front
+    @classmethod
+    def load(cls, directory, mmap=True):
+        mode = "r" if mmap else None
+        return cls(**{name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mode) for name in ARRAYS})
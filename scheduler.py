@@ -0,0 +1,168 @@
+import contextvars
+import heapq
+import itertools
+import os
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+from telemetry import get_telemetry, span
+
+# Lower value = served first
+INTERACTIVE = 0
+BATCH = 1
+PREFETCH = 2
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BATCH: "batch", PREFETCH: "prefetch"}
+
+MAX_CONCURRENCY = int(os.environ.get("WATSONX_MAX_CONCURRENCY", "8"))
+# Slots only interactive requests may take, so a page never waits behind a full house of background jobs
+INTERACTIVE_RESERVE = 1
+
+_priority = contextvars.ContextVar("watsonx_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority):
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def current_priority():
+    return _priority.get()
+
+
+# Caps concurrent upstream calls; waiters are served by priority, then arrival order
+class Governor:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, interactive_reserve=INTERACTIVE_RESERVE):
+        self.max_concurrency = max_concurrency
+        self.interactive_reserve = min(interactive_reserve, max_concurrency - 1)
+        self.active = 0
+        self._heap = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self.stats = {"acquired": 0, "queued": 0, "wait_seconds": 0.0}
+
+    def _limit(self, priority):
+        return self.max_concurrency if priority == INTERACTIVE else self.max_concurrency - self.interactive_reserve
+
+    # Hand free slots to the best waiters; a background waiter at the head does not block interactive ones behind it
+    def _dispatch(self):
+        skipped = []
+        while self._heap and self.active < self.max_concurrency:
+            entry = heapq.heappop(self._heap)
+            if entry[3]["cancelled"]:
+                continue
+            if self.active >= self._limit(entry[0]):
+                skipped.append(entry)
+                continue
+            self.active += 1
+            entry[3]["granted"] = True
+            entry[2].set()
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+
+    @contextmanager
+    def slot(self, priority=None):
+        priority = current_priority() if priority is None else priority
+        start = time.perf_counter()
+        with self._lock:
+            if not self._heap and self.active < self._limit(priority):
+                self.active += 1
+                event = None
+            else:
+                event = threading.Event()
+                ticket = {"granted": False, "cancelled": False}
+                heapq.heappush(self._heap, (priority, next(self._seq), event, ticket))
+                self.stats["queued"] += 1
+                self._dispatch()
+        if event is not None:
+            with span("governor_wait", priority=PRIORITY_NAMES.get(priority, priority)):
+                try:
+                    event.wait()
+                except BaseException:
+                    with self._lock:
+                        if ticket["granted"]:
+                            self.active -= 1
+                            self._dispatch()
+                        ticket["cancelled"] = True
+                    raise
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["wait_seconds"] += time.perf_counter() - start
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active -= 1
+                self._dispatch()
+
+    def metrics(self):
+        with self._lock:
+            acquired = self.stats["acquired"]
+            return {
+                "governor_active": self.active,
+                "governor_queue_depth": sum(1 for entry in self._heap if not entry[3]["cancelled"]),
+                "governor_queued_total": self.stats["queued"],
+                "governor_acquired_total": acquired,
+                "governor_mean_wait_seconds": round(self.stats["wait_seconds"] / acquired, 6) if acquired else 0.0,
+            }
+
+
+# Identical in-flight requests share one upstream call: the first caller leads, the rest wait on its future
+class SingleFlight:
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    # (True, future) for the leader, who must call finish(); (False, future) for followers
+    def join(self, key):
+        with self._lock:
+            future = self._flights.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return False, future
+            future = self._flights[key] = Future()
+            return True, future
+
+    def finish(self, key, result=None, error=None):
+        with self._lock:
+            future = self._flights.pop(key)
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def do(self, key, fn):
+        leader, future = self.join(key)
+        if not leader:
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self.finish(key, error=e)
+            raise
+        self.finish(key, result)
+        return result
+
+    def metrics(self):
+        with self._lock:
+            return {"singleflight_inflight": len(self._flights), "singleflight_coalesced_total": self.coalesced}
+
+
+_governor = Governor()
+_single_flight = SingleFlight()
+get_telemetry().register_gauges("governor", _governor.metrics)
+get_telemetry().register_gauges("singleflight", _single_flight.metrics)
+
+
+def get_governor():
+    return _governor
+
+
+def get_single_flight():
+    return _single_flight
@@ -0,0 +1,9 @@
+import os
+
+# Local on-disk state (caches, data store, logs) lives here
+DATA_DIR = os.environ.get("TASKGENE_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"))
+
+
+def data_path(name):
+    os.makedirs(DATA_DIR, exist_ok=True)
+    return os.path.join(DATA_DIR, name)
@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+from team_stats import BURNOUT_THRESHOLD
+
+# Share of its monotony a member sheds on taking over work entirely unlike their own
+NOVELTY = 0.5
+# Weight of lost skill coverage against monotony (both on a 0-1 scale) in a swap's cost
+COVERAGE_WEIGHT = 0.25
+# Partners kept per at-risk member after pruning; only these pairs reach the matcher
+CANDIDATES = 16
+# Exact assignment up to this many at-risk members, greedy matching beyond it
+HUNGARIAN_MAX = 256
+# Cap on pair costs held in memory at once while scoring candidates
+BLOCK_CELLS = 1 << 22
+_UNMATCHED = 1e9
+
+
+def _profiles(skills):
+    totals = skills.sum(axis=1, keepdims=True)
+    return np.divide(skills, totals, out=np.full_like(skills, 1 / skills.shape[1]), where=totals > 0), totals[:, 0]
+
+
+# Cost of every (at-risk member, partner) pair for one block of at-risk members, vectorized over partners.
+# Swapping exchanges work: each takes over the other's routine, which feels fresher the more it differs from
+# their own (novelty = total-variation distance of skill profiles), so the pair's monotony peak becomes
+# (1 - NOVELTY * novelty) * the higher score. Coverage loss is the share of the other's skill levels the
+# newcomer lacks, weighted by the productivity of the work being handed over.
+def swap_costs(skills, monotony, productivity, rows, cols):
+    profiles, totals = _profiles(skills)
+    # One 2-D pass per skill keeps the temporaries at block size, whatever the number of skills
+    novelty = np.zeros((len(rows), len(cols)))
+    missing_partner = np.zeros_like(novelty)
+    missing_own = np.zeros_like(novelty)
+    for s in range(skills.shape[1]):
+        novelty += np.abs(profiles[rows, s, None] - profiles[None, cols, s])
+        gap = skills[None, cols, s] - skills[rows, s, None]
+        missing_partner += np.maximum(gap, 0)
+        missing_own += np.maximum(-gap, 0)
+    novelty *= 0.5
+    lacks_partner_work = np.divide(missing_partner, totals[None, cols], out=missing_partner,
+                                   where=totals[None, cols] > 0)
+    lacks_own_work = np.divide(missing_own, totals[rows, None], out=missing_own, where=totals[rows, None] > 0)
+    weight_row, weight_col = productivity[rows, None], productivity[None, cols]
+    weights = np.maximum(weight_row + weight_col, 1e-9)
+    coverage_loss = (lacks_partner_work * weight_col + lacks_own_work * weight_row) / weights
+    relief = 1 - NOVELTY * novelty
+    peak = relief * np.maximum(monotony[rows, None], monotony[None, cols])
+    return peak / 100 + COVERAGE_WEIGHT * coverage_loss, relief, coverage_loss
+
+
+# The CANDIDATES cheapest partners per at-risk member, keeping only swaps whose cost beats doing nothing
+# (the member's current monotony). Scored in row blocks so memory stays bounded for thousands of people.
+def candidate_pairs(skills, monotony, productivity, rows, cols, candidates=CANDIDATES):
+    block = max(1, BLOCK_CELLS // max(len(cols), 1))
+    keep = min(candidates, len(cols))
+    found = []
+    for start in range(0, len(rows), block):
+        chunk = rows[start:start + block]
+        cost, relief, coverage_loss = swap_costs(skills, monotony, productivity, chunk, cols)
+        best = np.argpartition(cost, keep - 1, axis=1)[:, :keep] if keep < len(cols) else \
+            np.broadcast_to(np.arange(len(cols)), cost.shape)
+        local = np.repeat(np.arange(len(chunk)), best.shape[1])
+        best = best.ravel()
+        useful = cost[local, best] < monotony[chunk][local] / 100
+        local, best = local[useful], best[useful]
+        found.append(pd.DataFrame({
+            "row": chunk[local], "col": cols[best], "cost": cost[local, best],
+            "relief": relief[local, best], "coverage_loss": coverage_loss[local, best],
+        }))
+    return pd.concat(found, ignore_index=True) if found else pd.DataFrame(
+        columns=["row", "col", "cost", "relief", "coverage_loss"])
+
+
+# Minimum-cost assignment of every row to a distinct column (rows <= columns), by shortest augmenting
+# paths with row/column potentials (the Hungarian method); the inner scan over columns is vectorized.
+def linear_assignment(cost):
+    n, m = cost.shape
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=int)
+    way = np.zeros(m + 1, dtype=int)
+    for i in range(1, n + 1):
+        owner[0] = i
+        j0 = 0
+        minv = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[j0] = True
+            i0 = owner[j0]
+            free = ~used[1:]
+            reduced = cost[i0 - 1] - u[i0] - v[1:]
+            better = free & (reduced < minv[1:])
+            minv[1:][better] = reduced[better]
+            way[1:][better] = j0
+            masked = np.where(free, minv[1:], np.inf)
+            j1 = int(masked.argmin()) + 1
+            delta = masked[j1 - 1]
+            u[owner[used]] += delta
+            v[used] -= delta
+            minv[1:][free] -= delta
+            j0 = j1
+            if owner[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            owner[j0] = owner[j1]
+            j0 = j1
+    cols = np.flatnonzero(owner[1:])
+    return owner[1:][cols] - 1, cols
+
+
+# Cheapest pairs first, each person used at most once; for pools too big for the exact solver
+def greedy_matching(pairs):
+    taken = set()
+    picked = []
+    for index, row, col in pairs.sort_values("cost")[["row", "col"]].itertuples(name=None):
+        if row not in taken and col not in taken:
+            taken.update((row, col))
+            picked.append(index)
+    return pairs.loc[picked]
+
+
+def _solve(pairs):
+    rows = np.unique(pairs["row"])
+    cols = np.unique(pairs["col"])
+    if len(rows) > HUNGARIAN_MAX:
+        return greedy_matching(pairs)
+    r = np.searchsorted(rows, pairs["row"].to_numpy())
+    c = np.searchsorted(cols, pairs["col"].to_numpy())
+    dense = np.full((len(rows), len(cols)), _UNMATCHED)
+    dense[r, c] = pairs["cost"].to_numpy()
+    pair_at = np.full(dense.shape, -1)
+    pair_at[r, c] = np.arange(len(pairs))
+    if len(rows) <= len(cols):
+        chosen_r, chosen_c = linear_assignment(dense)
+    else:
+        chosen_c, chosen_r = linear_assignment(dense.T)
+    chosen = pair_at[chosen_r, chosen_c]
+    return pairs.iloc[chosen[chosen >= 0]]
+
+
+# Pair each member at or above the burnout threshold with a partner below it so the team's monotony peak
+# drops while skill coverage holds. Returns one row per swap, highest current monotony first.
+def recommend_swaps(names, monotony, productivity, skill_matrix, threshold=BURNOUT_THRESHOLD):
+    names = np.asarray(names)
+    monotony = np.asarray(monotony, dtype=float)
+    productivity = np.asarray(productivity, dtype=float)
+    skills = skill_matrix.reindex(names).fillna(0).to_numpy(dtype=float)
+    rows = np.flatnonzero(monotony >= threshold)
+    cols = np.flatnonzero(monotony < threshold)
+    columns = ["member", "partner", "monotony", "partner_monotony", "monotony_after", "partner_monotony_after",
+               "skill_gap", "cost"]
+    if not len(rows) or not len(cols):
+        return pd.DataFrame(columns=columns)
+    pairs = candidate_pairs(skills, monotony, productivity, rows, cols)
+    if pairs.empty:
+        return pd.DataFrame(columns=columns)
+    chosen = _solve(pairs)
+    row, col = chosen["row"].to_numpy(dtype=int), chosen["col"].to_numpy(dtype=int)
+    relief = chosen["relief"].to_numpy()
+    swaps = pd.DataFrame({
+        "member": names[row],
+        "partner": names[col],
+        "monotony": monotony[row],
+        "partner_monotony": monotony[col],
+        "monotony_after": np.rint(relief * monotony[col]),
+        "partner_monotony_after": np.rint(relief * monotony[row]),
+        "skill_gap": np.rint(100 * chosen["coverage_loss"].to_numpy()),
+        "cost": chosen["cost"].to_numpy(),
+    })
+    return swaps.sort_values(["monotony", "cost"], ascending=[False, True]).reset_index(drop=True)
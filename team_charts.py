@@ -0,0 +1,88 @@
+import bisect
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+# Above this many members the Manager charts switch to their aggregated / top-N views
+LARGE_TEAM_THRESHOLD = 60
+HOTSPOT_N = 15
+PICKER_RESULTS = 50
+
+
+def is_large_team(count):
+    return count > LARGE_TEAM_THRESHOLD
+
+
+# Horizontal hotspot bar; large teams get the top-N and bottom-N members only
+def hotspot_bar(df, value_col, name_col="Team Member", color_scale="reds", ascending=False, n=HOTSPOT_N):
+    if is_large_team(len(df)):
+        values = df[value_col].to_numpy()
+        order = np.argsort(values, kind="stable")
+        picked = np.concatenate([order[-n:], order[:n]]) if len(order) > 2 * n else order
+        df = df.iloc[np.unique(picked)]
+    return px.bar(df.sort_values(by=value_col, ascending=ascending),
+                  x=value_col, y=name_col, orientation='h',
+                  color=value_col, color_continuous_scale=color_scale)
+
+
+# Monotony vs productivity; large teams get a single WebGL trace instead of one trace per member
+def correlation_scatter(df_corr, names):
+    if not is_large_team(len(df_corr)):
+        return px.scatter(df_corr, x="Monotony", y="Productivity", color=names)
+    fig = go.Figure(go.Scattergl(
+        x=df_corr["Monotony"], y=df_corr["Productivity"], mode="markers",
+        text=names, hovertemplate="%{text}<br>Monotony %{x}<br>Productivity %{y}<extra></extra>",
+        marker=dict(size=5, opacity=0.6, color=df_corr["Monotony"], colorscale="Reds")
+    ))
+    fig.update_layout(xaxis_title="Monotony", yaxis_title="Productivity")
+    return fig
+
+
+# Skill heatmap; large teams are binned server-side to one row per team
+def skill_heatmap(skill_matrix, teams=None):
+    if is_large_team(len(skill_matrix)) and teams is not None:
+        binned = skill_matrix.groupby(np.asarray(teams)).mean().round(1)
+        return px.imshow(binned,
+                         labels=dict(x="Skill", y="Team", color="Avg Credential Count"),
+                         aspect="auto", color_continuous_scale="Blues")
+    return px.imshow(skill_matrix,
+                     labels=dict(x="Skill", y="Team Member", color="Credential Count"),
+                     aspect="auto", color_continuous_scale="Blues")
+
+
+# Prefix index over every word of every member name (sorted array + bisect)
+class MemberIndex:
+    def __init__(self, names):
+        self.names = list(names)
+        self.positions = {name: i for i, name in enumerate(self.names)}
+        pairs = sorted((word, i) for i, name in enumerate(self.names) for word in str(name).lower().split())
+        self._words = [word for word, _ in pairs]
+        self._ids = [i for _, i in pairs]
+
+    def search(self, query, limit=PICKER_RESULTS):
+        terms = query.lower().split()
+        if not terms:
+            return self.names[:limit]
+        matches = None
+        for term in terms:
+            start = bisect.bisect_left(self._words, term)
+            end = bisect.bisect_left(self._words, term + "\uffff")
+            ids = set(self._ids[start:end])
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return []
+        return [self.names[i] for i in sorted(matches)[:limit]]
+
+
+# Small teams keep the plain selectbox; large teams search first and pick from the matches
+def member_picker(index, label="Select Team Member"):
+    if not is_large_team(len(index.names)):
+        return st.selectbox(label, index.names)
+    query = st.text_input("🔍 Search team members", placeholder="Type part of a name")
+    options = index.search(query)
+    if not options:
+        st.warning("No team members match that search.")
+        st.stop()
+    return st.selectbox(label, options)
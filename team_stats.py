@@ -0,0 +1,174 @@
+import numpy as np
+import pandas as pd
+
+# Scores at or above this are flagged as burnout risk on the Manager panel
+BURNOUT_THRESHOLD = 70
+OUTLIER_Z = 2.0
+# Cap how many names we list per bucket so prompts stay small for large teams
+MAX_NAMES = 5
+
+
+def _names(names, mask, order):
+    picked = names[order][mask[order]]
+    return [str(n) for n in picked[:MAX_NAMES]]
+
+
+# Extrema, mean, spread and z-score outliers for one per-member score column
+def score_summary(names, scores, higher_is_worse=False):
+    names = np.asarray(names)
+    values = np.asarray(scores, dtype=float)
+    order = np.argsort(values)[::-1]
+    mean = values.mean()
+    std = values.std()
+    z = (values - mean) / std if std > 0 else np.zeros_like(values)
+    summary = {
+        "count": int(values.size),
+        "highest": {"name": str(names[order[0]]), "value": float(values[order[0]])},
+        "lowest": {"name": str(names[order[-1]]), "value": float(values[order[-1]])},
+        "mean": round(float(mean), 1),
+        "median": round(float(np.median(values)), 1),
+        "std": round(float(std), 1),
+        "high_outliers": _names(names, z >= OUTLIER_Z, order),
+        "low_outliers": _names(names, z <= -OUTLIER_Z, order[::-1]),
+    }
+    if higher_is_worse:
+        at_risk = values >= BURNOUT_THRESHOLD
+        summary["at_risk_count"] = int(at_risk.sum())
+        summary["at_risk"] = _names(names, at_risk, order)
+    return summary
+
+
+# Per-skill averages and gaps against the best-covered skill, plus members with no credentials in a skill
+def skill_summary(skill_matrix, scale_max=10):
+    values = skill_matrix.to_numpy(dtype=float)
+    means = values.mean(axis=0)
+    order = np.argsort(means)[::-1]
+    skills = skill_matrix.columns.to_numpy()
+    zero_counts = (values == 0).sum(axis=0)
+    member_totals = values.sum(axis=1)
+    member_order = np.argsort(member_totals)[::-1]
+    members = skill_matrix.index.to_numpy()
+    return {
+        "members": int(values.shape[0]),
+        "skill_means": {str(skills[i]): round(float(means[i]), 1) for i in order},
+        "strongest_skill": str(skills[order[0]]),
+        "weakest_skill": str(skills[order[-1]]),
+        "gap_to_strongest": {str(skills[i]): round(float(means[order[0]] - means[i]), 1) for i in order[1:]},
+        "gap_to_max": {str(skills[i]): round(float(scale_max - means[i]), 1) for i in order},
+        "members_with_zero": {str(skills[i]): int(zero_counts[i]) for i in order},
+        "top_members": [str(m) for m in members[member_order[:MAX_NAMES]]],
+        "bottom_members": [str(m) for m in members[member_order[::-1][:MAX_NAMES]]],
+    }
+
+
+# Peak/dip weeks, week-over-week deltas and overall direction for each weekly series
+def trend_summary(weekly_trends, date_column="Week"):
+    weeks = pd.to_datetime(weekly_trends[date_column]).dt.strftime("%Y-%m-%d").to_numpy()
+    summary = {"weeks": int(len(weeks))}
+    for column in weekly_trends.columns.drop(date_column):
+        values = weekly_trends[column].to_numpy(dtype=float)
+        deltas = np.diff(values)
+        entry = {
+            "peak": {"week": str(weeks[values.argmax()]), "value": float(values.max())},
+            "dip": {"week": str(weeks[values.argmin()]), "value": float(values.min())},
+            "mean": round(float(values.mean()), 1),
+            "first_to_last": round(float(values[-1] - values[0]), 1),
+        }
+        if deltas.size:
+            entry["biggest_rise"] = {"week": str(weeks[deltas.argmax() + 1]), "delta": float(deltas.max())}
+            entry["biggest_drop"] = {"week": str(weeks[deltas.argmin() + 1]), "delta": float(deltas.min())}
+            entry["week_over_week"] = [round(float(d), 1) for d in deltas[-MAX_NAMES:]]
+        summary[str(column)] = entry
+    return summary
+
+
+# Render a summary dict as compact "key: value" lines for the prompt
+def format_summary(summary, indent=""):
+    lines = []
+    for key, value in summary.items():
+        if isinstance(value, dict):
+            lines.append(f"{indent}{key}:")
+            lines.append(format_summary(value, indent + "  "))
+        elif isinstance(value, list):
+            lines.append(f"{indent}{key}: {', '.join(str(v) for v in value) or 'none'}")
+        else:
+            lines.append(f"{indent}{key}: {value}")
+    return "\n".join(lines)
+
+
+# Deterministic plain-language readings of the summaries above, shown while (or instead of) the LLM answers
+def score_reading(summary, label):
+    text = (f"Average {label} is {summary['mean']:g}% (median {summary['median']:g}%). "
+            f"Highest: {summary['highest']['name']} ({summary['highest']['value']:g}%); "
+            f"lowest: {summary['lowest']['name']} ({summary['lowest']['value']:g}%).")
+    if "at_risk_count" in summary:
+        if summary["at_risk_count"]:
+            text += (f" {summary['at_risk_count']} member(s) at or above the {BURNOUT_THRESHOLD}% burnout threshold: "
+                     f"{', '.join(summary['at_risk'])}.")
+        else:
+            text += f" Nobody is at or above the {BURNOUT_THRESHOLD}% burnout threshold."
+    if summary["high_outliers"] or summary["low_outliers"]:
+        text += (f" Unusually high: {', '.join(summary['high_outliers']) or 'none'}; "
+                 f"unusually low: {', '.join(summary['low_outliers']) or 'none'}.")
+    return text
+
+
+def skill_reading(summary):
+    weakest = summary["weakest_skill"]
+    return (f"Strongest skill across the team is {summary['strongest_skill']} "
+            f"(average {summary['skill_means'][summary['strongest_skill']]:g}); weakest is {weakest} "
+            f"(average {summary['skill_means'][weakest]:g}, {summary['gap_to_strongest'].get(weakest, 0):g} behind). "
+            f"{summary['members_with_zero'][weakest]} of {summary['members']} members have no credentials in {weakest}, "
+            f"so that is the natural training focus. Most rounded: {', '.join(summary['top_members'][:3])}.")
+
+
+def trend_reading(summary):
+    parts = []
+    for column, entry in summary.items():
+        if not isinstance(entry, dict):
+            continue
+        change = entry["first_to_last"]
+        direction = "rose" if change > 0 else "fell" if change < 0 else "held steady"
+        amount = f" by {abs(change):g}" if change else ""
+        parts.append(f"{column} {direction}{amount} over {summary['weeks']} weeks "
+                     f"(peak {entry['peak']['value']:g} in {entry['peak']['week']}, "
+                     f"dip {entry['dip']['value']:g} in {entry['dip']['week']}).")
+    return " ".join(parts)
+
+
+def workload_reading(distribution):
+    total = sum(distribution.values()) or 1
+    ordered = sorted(distribution.items(), key=lambda item: item[1], reverse=True)
+    (top, top_hours), (bottom, bottom_hours) = ordered[0], ordered[-1]
+    share = top_hours / total
+    balance = "concentrated" if share >= 2 / len(ordered) else "fairly balanced"
+    return (f"Most time goes to {top} ({top_hours:g}h, {share:.0%} of the week); least to {bottom} "
+            f"({bottom_hours:g}h). The load looks {balance} across {len(ordered)} task types.")
+
+
+def member_reading(name, monotony, productivity, skills):
+    ordered = sorted(skills.items(), key=lambda item: item[1], reverse=True)
+    risk = "above" if monotony >= BURNOUT_THRESHOLD else "below"
+    return (f"{name}: monotony {monotony}% ({risk} the {BURNOUT_THRESHOLD}% burnout threshold), productivity "
+            f"{productivity}%. Strongest skill is {ordered[0][0]}; a challenge in {ordered[-1][0]} is a good next step.")
+
+
+# The optimizer's chosen swaps (see swap_optimizer.recommend_swaps), capped for the prompt
+def swap_summary(swaps):
+    after = swaps[["monotony_after", "partner_monotony_after"]].max(axis=1)
+    return {
+        "swaps": int(len(swaps)),
+        "peak_monotony_before": float(swaps["monotony"].max()),
+        "peak_monotony_after": float(after.max()),
+        "mean_skill_gap": round(float(swaps["skill_gap"].mean()), 1),
+        "proposed": [f"{s.member} <-> {s.partner} (monotony {s.member} {s.monotony:g}% -> ~{s.monotony_after:g}%, "
+                     f"{s.partner} {s.partner_monotony:g}% -> ~{s.partner_monotony_after:g}%, skill gap {s.skill_gap:g}%)"
+                     for s in swaps.head(MAX_NAMES).itertuples()],
+    }
+
+
+def swap_reading(summary):
+    return (f"{summary['swaps']} swap(s) pair members at or above the {BURNOUT_THRESHOLD}% burnout threshold with "
+            f"partners whose work differs from theirs. Among the members swapped, peak monotony should fall from "
+            f"{summary['peak_monotony_before']:g}% to about {summary['peak_monotony_after']:g}%, at an average skill gap "
+            f"of {summary['mean_skill_gap']:g}% (the share of the other's skill levels a newcomer still has to learn).")
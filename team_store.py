@@ -0,0 +1,193 @@
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from storage import data_path
+
+SKILLS = ["Excel", "Python", "Viz", "Reporting"]
+
+SAMPLE_MEMBERS = [
+    ("Priya", "Finance"), ("Arjun Mehta", "Finance"), ("Sneha Iyer", "Analytics"), ("Rahul Verma", "Support"),
+    ("Aisha Khan", "Analytics"), ("Karan Patel", "Engineering"), ("Neha Reddy", "Support"), ("Vikram Das", "Engineering"),
+    ("Divya Nair", "Finance"), ("Rohit Sen", "Engineering"), ("Meera Joseph", "Support"), ("Ankit Rao", "Analytics")
+]
+
+SAMPLE_WORKLOAD = {
+    "Reporting": 18, "Excel Analysis": 15, "Email Management": 9, "Client Calls": 7, "Ad Hoc Tasks": 6
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS members (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL, team TEXT);
+CREATE TABLE IF NOT EXISTS scores (member_id INTEGER PRIMARY KEY REFERENCES members(id),
+                                   monotony REAL, productivity REAL);
+CREATE TABLE IF NOT EXISTS skills (member_id INTEGER REFERENCES members(id), skill TEXT, level INTEGER,
+                                   PRIMARY KEY (member_id, skill));
+CREATE TABLE IF NOT EXISTS weekly (week TEXT PRIMARY KEY, avg_monotony REAL, avg_productivity REAL,
+                                   updated_version INTEGER);
+CREATE TABLE IF NOT EXISTS workload (category TEXT PRIMARY KEY, hours REAL);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER);
+"""
+
+# Each table group has its own version stamp so e.g. a weekly append doesn't invalidate member loads
+TABLE_GROUPS = ("members", "weekly", "workload")
+
+
+class TeamStore:
+    def __init__(self, path=None):
+        self.path = path or data_path("team.sqlite3")
+        self._lock = threading.RLock()
+        self._weekly_cache = None
+        self._weekly_cache_version = 0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.executescript(_SCHEMA)
+        self._db.commit()
+        if self._db.execute("SELECT COUNT(*) FROM members").fetchone()[0] == 0:
+            self.seed_sample_data()
+
+    def get_version(self, group="members"):
+        with self._lock:
+            row = self._db.execute("SELECT value FROM meta WHERE key = ?", (group + "_version",)).fetchone()
+        return row[0] if row else 0
+
+    def get_versions(self):
+        return tuple(self.get_version(group) for group in TABLE_GROUPS)
+
+    def _bump(self, group):
+        self._db.execute(
+            "INSERT INTO meta (key, value) VALUES (?, 1) ON CONFLICT(key) DO UPDATE SET value = value + 1",
+            (group + "_version",)
+        )
+        return self._db.execute("SELECT value FROM meta WHERE key = ?", (group + "_version",)).fetchone()[0]
+
+    # Deterministic demo team so reruns (and response caching) see stable data
+    def seed_sample_data(self, seed=7, weeks=6):
+        rng = np.random.default_rng(seed)
+        members = pd.DataFrame(SAMPLE_MEMBERS, columns=["name", "team"])
+        members["monotony"] = rng.integers(35, 86, len(members))
+        members["productivity"] = rng.integers(65, 101, len(members))
+        skills = pd.DataFrame(rng.integers(0, 10, size=(len(members), len(SKILLS))), columns=SKILLS)
+        skills.insert(0, "name", members["name"])
+        self.upsert_members(members, skills)
+        week_index = pd.date_range(end=pd.Timestamp.today(), periods=weeks, freq="W")
+        self.append_weekly(pd.DataFrame({
+            "Week": week_index,
+            "Avg Monotony": rng.integers(45, 76, weeks),
+            "Avg Productivity": rng.integers(60, 96, weeks)
+        }))
+        self.set_workload(SAMPLE_WORKLOAD)
+
+    # members: DataFrame with name, team, monotony, productivity; skills: name plus one column per skill
+    def upsert_members(self, members, skills=None):
+        with self._lock:
+            self._db.executemany(
+                "INSERT INTO members (name, team) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET team = excluded.team",
+                members[["name", "team"]].itertuples(index=False, name=None)
+            )
+            ids = dict(self._db.execute("SELECT name, id FROM members"))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO scores (member_id, monotony, productivity) VALUES (?, ?, ?)",
+                ((ids[name], float(m), float(p)) for name, m, p in
+                 members[["name", "monotony", "productivity"]].itertuples(index=False, name=None))
+            )
+            if skills is not None:
+                long = skills.melt(id_vars="name", var_name="skill", value_name="level")
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO skills (member_id, skill, level) VALUES (?, ?, ?)",
+                    ((ids[name], skill, int(level)) for name, skill, level in long.itertuples(index=False, name=None))
+                )
+            self._bump("members")
+            self._db.commit()
+
+    # Incremental append (or correction) of weekly aggregates; existing weeks are replaced
+    def append_weekly(self, weekly):
+        with self._lock:
+            version = self._bump("weekly")
+            rows = zip(pd.to_datetime(weekly["Week"]).dt.strftime("%Y-%m-%d"),
+                       weekly["Avg Monotony"].astype(float), weekly["Avg Productivity"].astype(float),
+                       [version] * len(weekly))
+            self._db.executemany(
+                "INSERT OR REPLACE INTO weekly (week, avg_monotony, avg_productivity, updated_version) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+    # scores: DataFrame with name, monotony, productivity; names not already on the team are skipped
+    def update_scores(self, scores):
+        with self._lock:
+            self._db.executemany(
+                "UPDATE scores SET monotony = ?, productivity = ? WHERE member_id = (SELECT id FROM members WHERE name = ?)",
+                ((float(m), float(p), name) for name, m, p in
+                 scores[["name", "monotony", "productivity"]].itertuples(index=False, name=None))
+            )
+            self._bump("members")
+            self._db.commit()
+
+    def set_workload(self, hours_by_category):
+        with self._lock:
+            self._db.execute("DELETE FROM workload")
+            self._db.executemany("INSERT INTO workload (category, hours) VALUES (?, ?)", hours_by_category.items())
+            self._bump("workload")
+            self._db.commit()
+
+    def load_members(self):
+        with self._lock:
+            return self._load_members()
+
+    def _load_members(self):
+        members = pd.read_sql_query(
+            "SELECT m.name, m.team, s.monotony, s.productivity FROM members m "
+            "JOIN scores s ON s.member_id = m.id ORDER BY m.id", self._db)
+        skills = pd.read_sql_query(
+            "SELECT m.name, k.skill, k.level FROM skills k JOIN members m ON m.id = k.member_id", self._db)
+        skill_matrix = (skills.pivot(index="name", columns="skill", values="level")
+                        .reindex(index=members["name"], columns=SKILLS).fillna(0).astype(int))
+        skill_matrix.index.name = None
+        skill_matrix.columns.name = None
+        return members, skill_matrix
+
+    # Rows written after a given weekly version (0 loads everything)
+    def load_weekly(self, since_version=0):
+        with self._lock:
+            weekly = pd.read_sql_query(
+                "SELECT week, avg_monotony, avg_productivity FROM weekly WHERE updated_version > ? ORDER BY week",
+                self._db, params=(since_version,))
+        return pd.DataFrame({
+            "Week": pd.to_datetime(weekly["week"]),
+            "Avg Monotony": weekly["avg_monotony"],
+            "Avg Productivity": weekly["avg_productivity"]
+        })
+
+    # Process-wide weekly frame that only pulls rows changed since the last load
+    def load_weekly_incremental(self):
+        with self._lock:
+            version = self.get_version("weekly")
+            if self._weekly_cache is None or version != self._weekly_cache_version:
+                changed = self.load_weekly(self._weekly_cache_version if self._weekly_cache is not None else 0)
+                if self._weekly_cache is None:
+                    merged = changed
+                else:
+                    merged = (pd.concat([self._weekly_cache, changed])
+                              .drop_duplicates(subset="Week", keep="last")
+                              .sort_values("Week").reset_index(drop=True))
+                self._weekly_cache = merged
+                self._weekly_cache_version = version
+            return self._weekly_cache
+
+    def load_workload(self):
+        with self._lock:
+            return dict(self._db.execute("SELECT category, hours FROM workload ORDER BY hours DESC"))
+
+
+_default_store = None
+_default_store_lock = threading.Lock()
+
+
+def get_team_store():
+    global _default_store
+    if _default_store is None:
+        with _default_store_lock:
+            if _default_store is None:
+                _default_store = TeamStore()
+    return _default_store
@@ -0,0 +1,165 @@
+import atexit
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from storage import data_path
+
+# Latency histogram buckets (seconds) for the Prometheus export
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+# Spans kept per rerun for the per-rerun breakdown, and reruns kept until they are drained
+RERUN_SPANS = 500
+MAX_RERUNS = 64
+EXPORT_INTERVAL = 10.0
+
+# Id of the rerun the current code is working for; executor jobs see it through ContextExecutor
+_rerun = contextvars.ContextVar("taskgene_rerun", default=None)
+_rerun_ids = itertools.count(1)
+_reruns = OrderedDict()
+_reruns_lock = threading.Lock()
+
+
+# Pool whose jobs run in a copy of the submitter's context, so their spans count toward the rerun that asked for them
+class ContextExecutor(ThreadPoolExecutor):
+    def submit(self, fn, /, *args, **kwargs):
+        return super().submit(contextvars.copy_context().run, fn, *args, **kwargs)
+
+
+# Per-stage timings, Watsonx token counts and cache counters, exported as JSONL traces and a Prometheus text file
+class Telemetry:
+    def __init__(self, trace_path=None, metrics_path=None):
+        self.trace_path = trace_path or data_path("traces.jsonl")
+        self.metrics_path = metrics_path or data_path("metrics.prom")
+        self._lock = threading.Lock()
+        self._pending = []
+        self.histograms = {}
+        self.tokens = {"input": 0, "generated": 0}
+        self._gauges = {}
+        self._last_export = 0.0
+
+    def record(self, name, seconds, attrs):
+        rerun_id = _rerun.get()
+        record = {"ts": round(time.time(), 3), "span": name, "ms": round(seconds * 1000, 2),
+                  "thread": threading.current_thread().name, "rerun": rerun_id, **attrs}
+        with self._lock:
+            self._pending.append(record)
+            hist = self.histograms.get(name)
+            if hist is None:
+                hist = self.histograms[name] = {"buckets": [0] * len(BUCKETS), "count": 0, "sum": 0.0}
+            hist["count"] += 1
+            hist["sum"] += seconds
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    hist["buckets"][i] += 1
+        if rerun_id is not None:
+            with _reruns_lock:
+                spans = _reruns.get(rerun_id)
+                if spans is not None:
+                    spans.append(record)
+
+    def record_tokens(self, input_tokens, generated_tokens):
+        with self._lock:
+            self.tokens["input"] += int(input_tokens or 0)
+            self.tokens["generated"] += int(generated_tokens or 0)
+
+    # Components register a callable returning {metric_name: value}; read only at export time
+    def register_gauges(self, name, collect):
+        with self._lock:
+            self._gauges[name] = collect
+
+    def flush_traces(self):
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            with open(self.trace_path, "a", encoding="utf-8") as f:
+                f.writelines(json.dumps(record) + "\n" for record in pending)
+
+    def prometheus_text(self):
+        lines = []
+        with self._lock:
+            histograms = {name: dict(hist, buckets=list(hist["buckets"])) for name, hist in self.histograms.items()}
+            tokens = dict(self.tokens)
+            gauges = list(self._gauges.values())
+        lines.append("# TYPE taskgene_span_seconds histogram")
+        for name, hist in sorted(histograms.items()):
+            for bound, count in zip(BUCKETS, hist["buckets"]):
+                lines.append(f'taskgene_span_seconds_bucket{{span="{name}",le="{bound}"}} {count}')
+            lines.append(f'taskgene_span_seconds_bucket{{span="{name}",le="+Inf"}} {hist["count"]}')
+            lines.append(f'taskgene_span_seconds_sum{{span="{name}"}} {hist["sum"]:.6f}')
+            lines.append(f'taskgene_span_seconds_count{{span="{name}"}} {hist["count"]}')
+        lines.append("# TYPE taskgene_watsonx_tokens_total counter")
+        for kind, count in tokens.items():
+            lines.append(f'taskgene_watsonx_tokens_total{{kind="{kind}"}} {count}')
+        for collect in gauges:
+            for metric, value in collect().items():
+                lines.append(f"taskgene_{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+    # Write the Prometheus file atomically so a scraper never reads half of it
+    def write_metrics(self):
+        tmp = self.metrics_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp, self.metrics_path)
+
+    # Called at the end of each rerun; does real work at most every EXPORT_INTERVAL seconds
+    def maybe_export(self, force=False):
+        now = time.time()
+        with self._lock:
+            if not force and now - self._last_export < EXPORT_INTERVAL:
+                return
+            self._last_export = now
+        self.flush_traces()
+        self.write_metrics()
+
+
+_default_telemetry = None
+_default_telemetry_lock = threading.Lock()
+
+
+def get_telemetry():
+    global _default_telemetry
+    if _default_telemetry is None:
+        with _default_telemetry_lock:
+            if _default_telemetry is None:
+                _default_telemetry = Telemetry()
+                atexit.register(_default_telemetry.maybe_export, True)
+    return _default_telemetry
+
+
+@contextmanager
+def span(name, **attrs):
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        get_telemetry().record(name, time.perf_counter() - start, attrs)
+
+
+def record_tokens(input_tokens, generated_tokens):
+    get_telemetry().record_tokens(input_tokens, generated_tokens)
+
+
+# Called at the top of each rerun; spans recorded in this context from now on (including work it submits
+# to a ContextExecutor) are grouped under the returned id
+def start_rerun():
+    rerun_id = next(_rerun_ids)
+    with _reruns_lock:
+        _reruns[rerun_id] = deque(maxlen=RERUN_SPANS)
+        while len(_reruns) > MAX_RERUNS:
+            _reruns.popitem(last=False)
+    _rerun.set(rerun_id)
+    return rerun_id
+
+
+# Spans recorded for a rerun (default: the current one) so far, oldest first; later spans are only traced
+def drain_rerun_spans(rerun_id=None):
+    with _reruns_lock:
+        spans = _reruns.pop(rerun_id or _rerun.get(), None)
+    return list(spans) if spans is not None else []
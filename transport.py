@@ -0,0 +1,200 @@
+import os
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from telemetry import get_telemetry
+
+CONNECT_TIMEOUT = float(os.environ.get("WATSONX_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.environ.get("WATSONX_READ_TIMEOUT", "60"))
+MAX_ATTEMPTS = int(os.environ.get("WATSONX_MAX_ATTEMPTS", "4"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Hedging sends a duplicate request once the first has run past the recent p95 latency;
+# off unless enabled, and only once enough latencies have been seen to trust the p95
+HEDGE = os.environ.get("WATSONX_HEDGE", "0") == "1"
+HEDGE_MIN_SAMPLES = 20
+LATENCY_WINDOW = 200
+
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+_hedge_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="watsonx-hedge")
+
+
+class TransportError(Exception):
+    pass
+
+
+class CircuitOpenError(TransportError):
+    pass
+
+
+# Full-jitter exponential backoff; a Retry-After header from the server wins when present
+def backoff_delay(attempt, response=None):
+    if response is not None and response.headers.get("Retry-After", "").isdigit():
+        return min(float(response.headers["Retry-After"]), BACKOFF_CAP)
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+class LatencyTracker:
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def add(self, seconds):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+
+# Closed → open after consecutive failures; after the reset timeout one trial call is let through (half-open)
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def state(self):
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            return "half-open" if time.time() - self.opened_at >= self.reset_timeout else "open"
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.time() - self.opened_at < self.reset_timeout or self._trial:
+                return False
+            self._trial = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.time()
+            self._trial = False
+
+
+# POSTs to one upstream with timeouts, retries on 429/5xx and network errors, optional hedging,
+# and a circuit breaker that fails fast while the upstream is unhealthy
+class Transport:
+    def __init__(self, name, session, hedge=HEDGE, max_attempts=MAX_ATTEMPTS,
+                 timeout=(CONNECT_TIMEOUT, READ_TIMEOUT)):
+        self.name = name
+        self.session = session
+        self.hedge = hedge
+        self.max_attempts = max_attempts
+        self.timeout = timeout
+        self.breaker = CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.stats = {"requests": 0, "retries": 0, "timeouts": 0, "hedges": 0, "failures": 0, "rejected": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, name, n=1):
+        with self._stats_lock:
+            self.stats[name] += n
+
+    def _send(self, url, kwargs):
+        start = time.time()
+        response = self.session.post(url, timeout=self.timeout, **kwargs)
+        if response.status_code < 500 and response.status_code != 429:
+            self.latency.add(time.time() - start)
+        return response
+
+    # First response wins; a duplicate goes out only if the original outlives the p95
+    def _hedged_send(self, url, kwargs):
+        p95 = self.latency.percentile(0.95)
+        if not self.hedge or p95 is None or kwargs.get("stream"):
+            return self._send(url, kwargs)
+        first = _hedge_executor.submit(self._send, url, kwargs)
+        done, _ = wait([first], timeout=p95)
+        if done:
+            return first.result()
+        self._count("hedges")
+        second = _hedge_executor.submit(self._send, url, kwargs)
+        done, _ = wait([first, second], return_when=FIRST_COMPLETED)
+        winner = next(iter(done))
+        if winner.exception() is not None:
+            other = second if winner is first else first
+            return other.result()
+        return winner.result()
+
+    def post(self, url, **kwargs):
+        if not self.breaker.allow():
+            self._count("rejected")
+            raise CircuitOpenError(f"{self.name} circuit open; failing fast")
+        self._count("requests")
+        error = None
+        # Any other exception (a bad request, an interrupted rerun) must still settle a half-open trial,
+        # or the breaker would stay waiting on it and never close
+        try:
+            for attempt in range(self.max_attempts):
+                if attempt:
+                    self._count("retries")
+                response = None
+                try:
+                    response = self._hedged_send(url, kwargs)
+                except requests.Timeout as e:
+                    self._count("timeouts")
+                    error = f"timed out: {e}"
+                except requests.ConnectionError as e:
+                    error = f"connection failed: {e}"
+                else:
+                    if response.status_code not in RETRY_STATUSES:
+                        self.breaker.record_success()
+                        return response
+                    error = f"HTTP {response.status_code}: {response.text[:200]}"
+                    response.close()
+                if attempt + 1 < self.max_attempts:
+                    time.sleep(backoff_delay(attempt, response))
+        except BaseException:
+            self._count("failures")
+            self.breaker.record_failure()
+            raise
+        self._count("failures")
+        self.breaker.record_failure()
+        raise TransportError(f"{self.name} failed after {self.max_attempts} attempts, {error}")
+
+    def metrics(self):
+        with self._stats_lock:
+            metrics = {f'transport_{stat}_total{{upstream="{self.name}"}}': count for stat, count in self.stats.items()}
+        metrics[f'transport_circuit_open{{upstream="{self.name}"}}'] = int(self.breaker.state() != "closed")
+        return metrics
+
+
+_transports = {}
+_transports_lock = threading.Lock()
+
+
+# One transport (and so one breaker and latency window) per upstream, shared across sessions
+def get_transport(name, session):
+    with _transports_lock:
+        transport = _transports.get(name)
+        if transport is None:
+            transport = _transports[name] = Transport(name, session)
+            get_telemetry().register_gauges(f"transport_{name}", transport.metrics)
+        return transport
@@ -0,0 +1,158 @@
+import threading
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+ROLLING_WEEKS = 4
+
+
+# Closed-form ordinary least squares for y = slope * x + intercept
+def least_squares(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    x_mean = x.mean()
+    y_mean = y.mean()
+    sxx = ((x - x_mean) ** 2).sum()
+    slope = ((x - x_mean) * (y - y_mean)).sum() / sxx if sxx else 0.0
+    return slope, y_mean - slope * x_mean
+
+
+def pearson(x, y):
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    xd = x - x.mean()
+    yd = y - y.mean()
+    denom = np.sqrt((xd ** 2).sum() * (yd ** 2).sum())
+    return float((xd * yd).sum() / denom) if denom else 0.0
+
+
+# Ranks with ties averaged, as Spearman expects
+def _average_ranks(values):
+    values = np.asarray(values)
+    order = np.argsort(values, kind="mergesort")
+    ranks = np.empty(len(values), dtype=float)
+    ranks[order] = np.arange(1, len(values) + 1)
+    _, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    sums = np.bincount(inverse, weights=ranks)
+    return (sums / counts)[inverse]
+
+
+def spearman(x, y):
+    return pearson(_average_ranks(x), _average_ranks(y))
+
+
+# Trailing mean over the last `window` points (shorter at the start of the series)
+def rolling_mean(values, window=ROLLING_WEEKS):
+    values = np.asarray(values, dtype=float)
+    sums = np.cumsum(np.insert(values, 0, 0.0))
+    idx = np.arange(1, len(values) + 1)
+    start = np.maximum(idx - window, 0)
+    return (sums[idx] - sums[start]) / (idx - start)
+
+
+# Running sums for a least-squares fit that can absorb new points in O(new points)
+class RunningFit:
+    def __init__(self):
+        self.n = 0
+        self.sx = self.sy = self.sxx = self.sxy = self.syy = 0.0
+
+    def add(self, x, y):
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        self.n += x.size
+        self.sx += x.sum()
+        self.sy += y.sum()
+        self.sxx += (x * x).sum()
+        self.sxy += (x * y).sum()
+        self.syy += (y * y).sum()
+
+    def line(self):
+        denom = self.n * self.sxx - self.sx ** 2
+        slope = (self.n * self.sxy - self.sx * self.sy) / denom if denom else 0.0
+        intercept = (self.sy - slope * self.sx) / self.n if self.n else 0.0
+        return slope, intercept
+
+    def pearson(self):
+        denom = np.sqrt((self.n * self.sxx - self.sx ** 2) * (self.n * self.syy - self.sy ** 2))
+        return float((self.n * self.sxy - self.sx * self.sy) / denom) if denom else 0.0
+
+
+# Per-column weekly trend lines and rolling means, updated incrementally as weeks are appended
+class WeeklyTrendEngine:
+    def __init__(self, columns=("Avg Monotony", "Avg Productivity"), window=ROLLING_WEEKS):
+        self.columns = list(columns)
+        self.window = window
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.origin = None
+        self.weeks = np.array([], dtype="datetime64[ns]")
+        self.values = {column: np.array([], dtype=float) for column in self.columns}
+        self.fits = {column: RunningFit() for column in self.columns}
+
+    def _x(self, weeks):
+        return (weeks - self.origin) / np.timedelta64(7, "D")
+
+    def update(self, weekly, date_column="Week"):
+        weeks = pd.to_datetime(weekly[date_column]).to_numpy()
+        seen = len(self.weeks)
+        # Rebuild if history was rewritten rather than appended to
+        if len(weeks) < seen or not np.array_equal(weeks[:seen], self.weeks) or any(
+                not np.array_equal(weekly[c].to_numpy(dtype=float)[:seen], self.values[c]) for c in self.columns):
+            self.reset()
+            seen = 0
+        if len(weeks) == seen:
+            return self
+        if self.origin is None:
+            self.origin = weeks[0]
+        new_weeks = weeks[seen:]
+        for column in self.columns:
+            new_values = weekly[column].to_numpy(dtype=float)[seen:]
+            self.fits[column].add(self._x(new_weeks), new_values)
+            self.values[column] = np.concatenate([self.values[column], new_values])
+        self.weeks = weeks
+        return self
+
+    def trend_line(self, column):
+        slope, intercept = self.fits[column].line()
+        return slope * self._x(self.weeks) + intercept, slope
+
+    def rolling(self, column):
+        return rolling_mean(self.values[column], self.window)
+
+    # Update and read under one lock so concurrent sessions see a consistent view
+    def snapshot(self, weekly, date_column="Week"):
+        with self._lock:
+            self.update(weekly, date_column)
+            lines = {}
+            for column in self.columns:
+                trend, slope = self.trend_line(column)
+                lines[column] = {"trend": trend, "slope": slope, "rolling": self.rolling(column)}
+            return self.weeks, lines
+
+
+# Draw a precomputed line onto an existing figure
+def add_line(fig, x, y, name, dash="dash", color=None):
+    fig.add_trace(go.Scatter(x=x, y=y, mode="lines", name=name,
+                             line=dict(dash=dash, color=color)))
+    return fig
+
+
+def add_fit_line(fig, x, y, name="OLS fit"):
+    x = np.asarray(x, dtype=float)
+    slope, intercept = least_squares(x, y)
+    xs = np.array([x.min(), x.max()])
+    return add_line(fig, xs, slope * xs + intercept, f"{name} (slope {slope:.2f})", dash="solid", color="black")
+
+
+# Weekly averages with the engine's rolling means and trend lines drawn on top
+def weekly_trend_figure(weekly_trends, engine):
+    fig = px.line(weekly_trends, x="Week", y=engine.columns, markers=True)
+    weeks, lines = engine.snapshot(weekly_trends)
+    for column, line in lines.items():
+        add_line(fig, weeks, line["rolling"], f"{column} ({engine.window}-week avg)", dash="dot")
+        add_line(fig, weeks, line["trend"], f"{column} trend ({line['slope']:+.2f}/week)")
+    return fig
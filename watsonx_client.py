@@ -0,0 +1,293 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from response_cache import get_response_cache, make_cache_key
+from scheduler import get_governor, get_single_flight
+from telemetry import record_tokens, span
+from transport import TransportError, get_transport
+
+# IBM Watsonx Credentials
+IBM_API_KEY = os.environ.get("IBM_API_KEY", "YOUR_IBM_API_KEY")
+PROJECT_ID = os.environ.get("WATSONX_PROJECT_ID", "YOUR_PROJECT_ID")
+
+# Overridable so the apps can run against a local fake server
+IAM_URL = os.environ.get("WATSONX_IAM_URL", "https://iam.cloud.ibm.com/identity/token")
+WATSONX_URL = os.environ.get("WATSONX_URL", "https://us-south.ml.cloud.ibm.com")
+GENERATION_PATH = "/ml/v1/text/generation?version=2024-01-15"
+GENERATION_STREAM_PATH = "/ml/v1/text/generation_stream?version=2024-01-15"
+MODEL_ID = "mistralai/mistral-large"
+
+DEFAULT_PARAMETERS = {
+    "decoding_method": "greedy",
+    "max_new_tokens": 8000,
+    "min_new_tokens": 0,
+    "stop_sequences": [],
+    "repetition_penalty": 1
+}
+
+# Refresh this many seconds before IAM says the token expires
+TOKEN_REFRESH_MARGIN = 300
+
+ERROR_MARKER = "⚠️ Watsonx error"
+DEGRADED_MARKER = "⚠️ Watsonx unavailable"
+
+# One keep-alive pool shared by every app in the process
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=32)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+# Process-wide IAM token cache: api_key -> (token, refresh_at)
+_tokens = {}
+_token_locks = {}
+_token_locks_guard = threading.Lock()
+
+
+def _token_lock(api_key):
+    with _token_locks_guard:
+        lock = _token_locks.get(api_key)
+        if lock is None:
+            lock = _token_locks[api_key] = threading.Lock()
+        return lock
+
+
+def _fetch_ibm_access_token(api_key):
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    data = {
+        "grant_type": "urn:ibm:params:oauth:grant-type:apikey",
+        "apikey": api_key
+    }
+    with span("iam_token"):
+        response = get_transport("iam", get_session()).post(IAM_URL, headers=headers, data=data)
+    try:
+        body = response.json()
+        access_token = body["access_token"]
+    except (ValueError, KeyError):
+        raise TransportError(f"IAM token request failed: HTTP {response.status_code}")
+    expires_in = body.get("expires_in", 3600)
+    refresh_at = time.time() + max(expires_in - TOKEN_REFRESH_MARGIN, expires_in / 2)
+    return access_token, refresh_at
+
+
+# Get IBM Access Token (cached until shortly before expiry, one refresh in flight per key)
+def get_ibm_access_token(api_key=IBM_API_KEY):
+    cached = _tokens.get(api_key)
+    if cached and time.time() < cached[1]:
+        return cached[0]
+    with _token_lock(api_key):
+        # Another session may have refreshed while we waited for the lock
+        cached = _tokens.get(api_key)
+        if cached and time.time() < cached[1]:
+            return cached[0]
+        _tokens[api_key] = _fetch_ibm_access_token(api_key)
+        return _tokens[api_key][0]
+
+
+def invalidate_ibm_access_token(api_key=IBM_API_KEY):
+    _tokens.pop(api_key, None)
+
+
+# Default parameters with a per-prompt token budget and stop sequences
+def generation_parameters(max_new_tokens=None, stop_sequences=None):
+    parameters = dict(DEFAULT_PARAMETERS)
+    if max_new_tokens is not None:
+        parameters["max_new_tokens"] = max_new_tokens
+    if stop_sequences is not None:
+        parameters["stop_sequences"] = list(stop_sequences)
+    return parameters
+
+
+def _generation_headers(access_token, accept):
+    return {
+        "Content-Type": "application/json",
+        "Accept": accept,
+        "Authorization": f"Bearer {access_token}"
+    }
+
+
+def _generation_payload(chunk_text, prompt_prefix, parameters):
+    return {
+        "input": prompt_prefix + chunk_text,
+        "parameters": parameters,
+        "model_id": MODEL_ID,
+        "project_id": PROJECT_ID
+    }
+
+
+def generation_transport():
+    return get_transport("watsonx", get_session())
+
+
+# While Watsonx is down, fall back to the last answer this exact request got (same prompt and data),
+# marked so callers show it but never cache it as a fresh answer
+def degraded_answer(cache_key, error):
+    previous = get_response_cache().stale(cache_key)
+    if previous is not None:
+        return f"{DEGRADED_MARKER}; last known insight:\n\n{previous}"
+    return f"{ERROR_MARKER}: {error}"
+
+
+# Error strings and last-known stand-ins: fine to display, never to cache or parse as a fresh reply
+def is_fallback(text):
+    return text.startswith((ERROR_MARKER, DEGRADED_MARKER))
+
+
+def _generate(chunk_text, access_token, prompt_prefix, parameters, cache_key, use_cache):
+    headers = _generation_headers(access_token, "application/json")
+    payload = _generation_payload(chunk_text, prompt_prefix, parameters)
+
+    with span("watsonx_generate", max_new_tokens=parameters["max_new_tokens"]) as attrs:
+        try:
+            with get_governor().slot():
+                response = generation_transport().post(WATSONX_URL + GENERATION_PATH, headers=headers, json=payload)
+        except TransportError as e:
+            attrs["error"] = "transport"
+            return degraded_answer(cache_key, str(e))
+        try:
+            result = response.json()
+            text = result["results"][0]["generated_text"]
+        except Exception as e:
+            attrs["error"] = f"HTTP {response.status_code}"
+            return f"{ERROR_MARKER}: {str(e)}\n\nResponse: {response.text}"
+        attrs["input_tokens"] = result["results"][0].get("input_token_count")
+        attrs["generated_tokens"] = result["results"][0].get("generated_token_count")
+        record_tokens(attrs["input_tokens"], attrs["generated_tokens"])
+    if use_cache:
+        get_response_cache().set(cache_key, text, prompt_prefix)
+    return text
+
+
+# Send request to IBM Granite model on Watsonx.
+# Greedy decoding is deterministic, so successful answers are served from the response cache,
+# and identical requests already in flight (from any session) share one upstream call.
+def send_chunk_to_watsonx(chunk_text, access_token, prompt_prefix, use_cache=True, parameters=None):
+    parameters = parameters or DEFAULT_PARAMETERS
+    cache_key = make_cache_key(MODEL_ID, parameters, prompt_prefix, chunk_text)
+    if use_cache:
+        cached = get_response_cache().get(cache_key)
+        if cached is not None:
+            return cached
+    if not access_token:
+        return degraded_answer(cache_key, "no IBM access token")
+    return get_single_flight().do(
+        cache_key, lambda: _generate(chunk_text, access_token, prompt_prefix, parameters, cache_key, use_cache))
+
+
+# Parse a server-sent event stream, yielding each event's decoded JSON data
+def _iter_sse_json(lines):
+    data_lines = []
+    for line in lines:
+        if line is None:
+            continue
+        if line == "":
+            if data_lines:
+                yield json.loads("\n".join(data_lines))
+                data_lines = []
+            continue
+        if line.startswith("data:"):
+            data_lines.append(line[5:].lstrip())
+    if data_lines:
+        yield json.loads("\n".join(data_lines))
+
+
+def _stream_generation(chunk_text, access_token, prompt_prefix, parameters, cache_key, use_cache):
+    headers = _generation_headers(access_token, "text/event-stream")
+    payload = _generation_payload(chunk_text, prompt_prefix, parameters)
+
+    pieces = []
+    # Token counts are cumulative per event; the last event carries the totals
+    counts = {}
+    with span("watsonx_stream", max_new_tokens=parameters["max_new_tokens"]) as attrs, get_governor().slot():
+        start = time.perf_counter()
+        try:
+            response = generation_transport().post(WATSONX_URL + GENERATION_STREAM_PATH, headers=headers,
+                                                   json=payload, stream=True)
+        except TransportError as e:
+            attrs["error"] = "transport"
+            yield degraded_answer(cache_key, str(e))
+            return
+
+        with response:
+            if response.status_code != 200:
+                attrs["error"] = f"HTTP {response.status_code}"
+                yield f"{ERROR_MARKER}: HTTP {response.status_code}\n\nResponse: {response.text}"
+                return
+            response.encoding = "utf-8"
+            try:
+                for event in _iter_sse_json(response.iter_lines(decode_unicode=True)):
+                    for result in event.get("results", []):
+                        for key in ("input_token_count", "generated_token_count"):
+                            if key in result:
+                                counts[key] = result[key]
+                        piece = result.get("generated_text", "")
+                        if piece:
+                            if not pieces:
+                                attrs["first_token_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                            pieces.append(piece)
+                            yield piece
+            except Exception as e:
+                attrs["error"] = "stream"
+                yield f"\n\n{ERROR_MARKER} (stream interrupted): {str(e)}"
+                return
+            finally:
+                attrs["input_tokens"] = counts.get("input_token_count")
+                attrs["generated_tokens"] = counts.get("generated_token_count")
+                record_tokens(attrs["input_tokens"], attrs["generated_tokens"])
+
+    if use_cache and pieces:
+        get_response_cache().set(cache_key, "".join(pieces), prompt_prefix)
+
+
+# Stream tokens from Watsonx as they are generated (generation_stream SSE endpoint).
+# The full text is written to the response cache once the stream completes. A session asking for
+# a prompt another session is already streaming waits for that stream and gets the whole text at once.
+def stream_chunk_from_watsonx(chunk_text, access_token, prompt_prefix, use_cache=True, parameters=None):
+    parameters = parameters or DEFAULT_PARAMETERS
+    cache_key = make_cache_key(MODEL_ID, parameters, prompt_prefix, chunk_text)
+    if use_cache:
+        cached = get_response_cache().get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+    if not access_token:
+        yield degraded_answer(cache_key, "no IBM access token")
+        return
+
+    leader, flight = get_single_flight().join(cache_key)
+    if not leader:
+        try:
+            text = flight.result()
+        except BaseException:
+            # The leading session went away mid-stream; generate it ourselves
+            yield from stream_chunk_from_watsonx(chunk_text, access_token, prompt_prefix, use_cache, parameters)
+            return
+        yield text
+        return
+
+    pieces = []
+    try:
+        for piece in _stream_generation(chunk_text, access_token, prompt_prefix, parameters, cache_key, use_cache):
+            pieces.append(piece)
+            yield piece
+    except BaseException as e:
+        get_single_flight().finish(cache_key, error=e)
+        raise
+    get_single_flight().finish(cache_key, "".join(pieces))